@@ -0,0 +1,158 @@
+# benchmarks/cases.py
+"""Benchmark cases for functions that run on every message or row.
+
+Each case is a zero-argument callable plus the number of items it processes
+per call, so results can be read per call and per item. Inputs are built once
+here and shaped like production traffic: multi-paragraph Chinese narration,
+guides with many segments, vision answers with long candidate lists.
+"""
+import json
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List
+
+# Settings are required at import time; benchmarks never reach the network
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_ANON_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.YmVuY2g")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.YmVuY2g")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("TTS_API_KEY", "sk-bench")
+
+from src.schemas.guide import AudioSegmentInfo, MetaMessage, TextMessage  # noqa: E402
+from src.models.guide_models import Guide, GuideSegment, IdentifySession  # noqa: E402
+from src.services.orchestrator import NarrativeOrchestrator  # noqa: E402
+from src.services.vision import vision_service  # noqa: E402
+from src.services.incremental_json import IncrementalArrayParser  # noqa: E402
+from src.services.timeline import StreamTimeline  # noqa: E402
+from src.core.metrics import Histogram  # noqa: E402
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], object]
+    items: int = 1  # units of work per call (sentences, rows, candidates...)
+
+
+SENTENCES = [
+    "这座建筑始建于一九二九年，是当时远东最高的建筑之一",
+    "外立面采用花岗岩砌筑，顶部的金字塔形铜顶在阳光下格外醒目",
+    "走进大堂，你会看到保存完好的意大利大理石地面和彩色玻璃穹顶",
+    "抗战时期，这里曾短暂作为外国记者的聚集地，留下了许多珍贵的报道",
+    "如今它是一家历史酒店，爵士乐队每晚仍在老年爵士酒吧演出",
+    "站在对岸远眺，可以把整排万国建筑博览群尽收眼底",
+    "据说设计师为了寻找合适的石材，曾经三次往返于苏州和上海之间",
+    "傍晚时分灯光亮起，江面的倒影是拍照的最佳时机",
+]
+PUNCT = "。！？；"
+
+
+def _transcript(n_sentences: int, seed: int = 7) -> str:
+    rnd = random.Random(seed)
+    return "".join(rnd.choice(SENTENCES) + rnd.choice(PUNCT) for _ in range(n_sentences))
+
+
+# What the orchestrator holds between deltas: a sentence or two plus a partial one
+STREAM_BUFFER = _transcript(2) + SENTENCES[3][:9]
+LONG_TRANSCRIPT = _transcript(120)  # ~3.5k characters, a long guide
+
+
+def _vision_content(n: int, seed: int = 11) -> str:
+    rnd = random.Random(seed)
+    candidates = [
+        {
+            "spot": rnd.choice(["和平饭店", "外滩万国建筑群", "东方明珠", "豫园九曲桥", "上海海关大楼"]) + f"{i}",
+            "confidence": round(rnd.random(), 3),
+            "bbox": {"x": rnd.random(), "y": rnd.random(), "w": 0.3, "h": 0.4},
+        }
+        for i in range(n)
+    ]
+    return "```json\n" + json.dumps({"candidates": candidates}, ensure_ascii=False) + "\n```"
+
+
+VISION_SMALL = {"content": _vision_content(3)}
+VISION_LARGE = {"content": _vision_content(50)}
+
+SEGMENT = AudioSegmentInfo(
+    seq=17, start_ms=60123, end_ms=63456, format="mp3", bitrate_kbps=128,
+    bytes_len=53312, object_key="guide_0123456789ab/0017.mp3",
+)
+
+NOW = datetime.now(timezone.utc).isoformat()
+SEGMENT_ROWS = [
+    {
+        "guide_id": "guide_0123456789ab", "seq": i, "start_ms": i * 3200, "end_ms": (i + 1) * 3200,
+        "format": "mp3", "bitrate_kbps": 128, "bytes_len": 51200 + i, "object_key": f"guide_0123456789ab/{i:04d}.mp3",
+        "id": f"00000000-0000-0000-0000-{i:012d}", "created_at": NOW,
+    }
+    for i in range(200)
+]
+GUIDE_ROWS = [
+    {
+        "guide_id": f"guide_{i:012x}", "device_id": "device-bench", "spot": "和平饭店", "title": "探索31.2397, 121.4998",
+        "confidence": 0.91, "transcript": LONG_TRANSCRIPT[:1200], "duration_ms": 95000, "created_at": NOW,
+    }
+    for i in range(50)
+]
+SESSION_ROWS = [
+    {
+        "identify_id": f"id_{i:012x}", "device_id": "device-bench", "lat": 31.2397, "lng": 121.4998,
+        "accuracy_m": 12, "spot": "和平饭店", "confidence": 0.87, "bbox": {"x": 0.1, "y": 0.2, "w": 0.5, "h": 0.6},
+        "source": "vision", "created_at": NOW,
+    }
+    for i in range(200)
+]
+
+TEXT = TextMessage(type="text", delta=SENTENCES[0] + "。")
+META = MetaMessage(
+    type="meta", guideId="guide_0123456789ab", title="探索31.2397, 121.4998",
+    spot="正在识别...", confidence=0.8, estimatedDurationMs=120000,
+)
+
+
+def _send_encode(message) -> bytes:
+    # Same work as NarrativeOrchestrator._safe_send_json plus the socket's utf-8 encode
+    return json.dumps(message.model_dump(), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _stream_parse(content: str, chunk: int) -> int:
+    parser = IncrementalArrayParser("candidates")
+    found = 0
+    for i in range(0, len(content), chunk):
+        found += len(parser.feed(content[i:i + chunk]))
+    return found
+
+
+def _timeline_run(events: int) -> dict:
+    timeline = StreamTimeline()
+    for i in range(events):
+        timeline.mark("sentence", idx=i, chars=30)
+    return timeline.to_dict()
+
+
+HIST = Histogram("bench_seconds", "benchmark only")
+
+
+def build_cases() -> List[Case]:
+    extract = NarrativeOrchestrator._extract_sentences
+    header = NarrativeOrchestrator._create_binary_header
+    return [
+        Case("orchestrator.extract_sentences[stream_buffer]", lambda: extract(None, STREAM_BUFFER)),
+        Case("orchestrator.extract_sentences[long_transcript]", lambda: extract(None, LONG_TRANSCRIPT), items=120),
+        Case("orchestrator.create_binary_header", lambda: header(None, SEGMENT)),
+        Case("vision.parse_vision_response[3]", lambda: vision_service._parse_vision_response(VISION_SMALL), items=3),
+        Case("vision.parse_vision_response[50]", lambda: vision_service._parse_vision_response(VISION_LARGE), items=50),
+        Case("incremental_json.feed[50, 16-char chunks]", lambda: _stream_parse(VISION_LARGE["content"], 16), items=50),
+        Case("schemas.TextMessage.model_dump", TEXT.model_dump),
+        Case("schemas.MetaMessage.model_dump", META.model_dump),
+        Case("schemas.TextMessage.send_encode", lambda: _send_encode(TEXT)),
+        Case("schemas.TextMessage.construct+send_encode",
+             lambda: _send_encode(TextMessage(type="text", delta=SENTENCES[1]))),
+        Case("models.GuideSegment.from_rows[200]", lambda: [GuideSegment(**r) for r in SEGMENT_ROWS], items=200),
+        Case("models.Guide.from_rows[50]", lambda: [Guide(**r) for r in GUIDE_ROWS], items=50),
+        Case("models.IdentifySession.from_rows[200]", lambda: [IdentifySession(**r) for r in SESSION_ROWS], items=200),
+        Case("timeline.mark+to_dict[40]", lambda: _timeline_run(40), items=40),
+        Case("metrics.Histogram.observe", lambda: HIST.observe(0.42)),
+    ]
@@ -0,0 +1,137 @@
+# benchmarks/run.py
+"""Run the micro-benchmarks and print or save machine-readable results.
+
+Each case is calibrated so one sample takes at least --min-time seconds, then
+timed --repeat times with the GC disabled (as timeit does). The reported
+figure is the median per-call time; min and relative stdev show how noisy
+the machine was. Save a run with --json and pass it back with --compare to
+see the speedup of every case.
+
+    cd server && python -m benchmarks.run --json before.json
+    cd server && python -m benchmarks.run --compare before.json
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from .cases import Case, build_cases
+
+
+def _loop(fn: Callable[[], object], loops: int) -> float:
+    rng = range(loops)
+    started = time.perf_counter()
+    for _ in rng:
+        fn()
+    return time.perf_counter() - started
+
+
+def calibrate(fn: Callable[[], object], min_time: float) -> int:
+    loops = 1
+    while True:
+        if _loop(fn, loops) >= min_time:
+            return loops
+        loops *= 2
+
+
+def measure(case: Case, repeat: int, min_time: float) -> Dict:
+    case.fn()  # warm caches and lazy pydantic validators
+    loops = calibrate(case.fn, min_time)
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        samples = [_loop(case.fn, loops) / loops for _ in range(repeat)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    median = statistics.median(samples)
+    return {
+        "name": case.name,
+        "items": case.items,
+        "loops": loops,
+        "repeat": repeat,
+        "median_ns": median * 1e9,
+        "min_ns": min(samples) * 1e9,
+        "rel_stdev": statistics.pstdev(samples) / median if median else 0.0,
+        "per_item_ns": median * 1e9 / case.items,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fmt_ns(ns: float) -> str:
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f}{unit}"
+    return f"{ns:.0f}ns"
+
+
+def print_results(results: List[Dict], baseline: Optional[Dict[str, Dict]] = None) -> None:
+    width = max(len(r["name"]) for r in results)
+    header = f"{'case':<{width}}  {'median':>9}  {'min':>9}  {'±':>5}  {'per item':>9}"
+    if baseline:
+        header += f"  {'baseline':>9}  {'speedup':>7}"
+    print(header)
+    for r in results:
+        line = (f"{r['name']:<{width}}  {_fmt_ns(r['median_ns']):>9}  {_fmt_ns(r['min_ns']):>9}  "
+                f"{r['rel_stdev'] * 100:>4.1f}%  {_fmt_ns(r['per_item_ns']):>9}")
+        if baseline:
+            before = baseline.get(r["name"])
+            if before:
+                line += f"  {_fmt_ns(before['median_ns']):>9}  {before['median_ns'] / r['median_ns']:>6.2f}x"
+            else:
+                line += f"  {'-':>9}  {'new':>7}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for per-message hot paths")
+    parser.add_argument("-k", "--filter", help="only run cases whose name contains this substring")
+    parser.add_argument("--repeat", type=int, default=15, help="timed samples per case")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --json run")
+    args = parser.parse_args()
+
+    cases = [c for c in build_cases() if not args.filter or args.filter in c.name]
+    if not cases:
+        sys.exit(f"no benchmark matches {args.filter!r}")
+    results = [measure(c, args.repeat, args.min_time) for c in cases]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {r["name"]: r for r in json.load(f)["results"]}
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "meta": {
+                    "commit": _git_commit(),
+                    "python": platform.python_version(),
+                    "implementation": platform.python_implementation(),
+                    "machine": platform.machine(),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "repeat": args.repeat,
+                    "min_time_s": args.min_time,
+                },
+                "results": results,
+            }, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# loadtest/fakes.py
+"""Local stand-ins for OpenAI and Supabase used by the load-test harness.
+
+Two small ASGI apps, each with its own latency / jitter / error profile:
+
+* OpenAI: POST /v1/responses (streamed SSE or plain JSON) and
+  POST /v1/audio/speech. Requests carrying an image get a candidates JSON
+  answer, everything else gets narration text; TTS returns bytes sized like
+  real mp3 output.
+* Supabase: an in-memory PostgREST subset (insert/select/update/delete with
+  eq/neq/lt/lte/gt/gte/is/in filters, order, limit, single-object Accept) plus
+  storage object upload/download/list/remove.
+
+Run standalone with `python -m loadtest.fakes --help`; loadtest.run starts it
+as a subprocess.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+NARRATION = (
+    "这里是城市里最有故事的地方之一。它建成于上个世纪初，见证了许多重要的历史时刻。"
+    "走近一些，你会看到墙面上保留着当年的雕刻细节。当地人常在傍晚来这里散步，"
+    "灯光亮起时景色尤其动人。据说最早的设计者曾为了一块石材往返三次。"
+    "离开前，不妨在东侧的台阶上停留片刻，那里是拍照的最佳位置。"
+)
+SPOTS = ["外滩", "东方明珠", "豫园", "南京路步行街", "人民广场"]
+
+# Roughly what tts-1 mp3 output weighs per input character
+TTS_BYTES_PER_CHAR = 1200
+
+
+@dataclass
+class FaultProfile:
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    async def delay(self, scale: float = 1.0) -> None:
+        wait = (self.latency_s + random.uniform(-self.jitter_s, self.jitter_s)) * scale
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def fail(self) -> Optional[Response]:
+        if self.error_rate and random.random() < self.error_rate:
+            return JSONResponse(
+                status_code=self.error_status,
+                content={"error": {"message": "injected failure", "type": "server_error"}},
+            )
+        return None
+
+
+def _chunks(text: str, size: int) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def _response_object(response_id: str, model: str, text: str, status: str = "completed") -> Dict[str, Any]:
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": status,
+        "output": [] if status != "completed" else [{
+            "type": "message",
+            "id": f"msg_{response_id}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": 300,
+            "output_tokens": max(1, len(text) // 2),
+            "total_tokens": 300 + max(1, len(text) // 2),
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+def _sse(event: Dict[str, Any]) -> bytes:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def create_openai_app(
+    profile: FaultProfile,
+    tts: FaultProfile,
+    token_interval_s: float = 0.02,
+    chars_per_token: int = 2,
+) -> FastAPI:
+    """`profile` applies to /v1/responses (latency = time to first token), `tts` to speech"""
+    app = FastAPI(title="fake-openai")
+
+    @app.post("/v1/responses")
+    async def responses(request: Request):
+        raw = await request.body()
+        body = json.loads(raw or b"{}")
+        model = body.get("model", "fake")
+        if b"input_image" in raw:
+            spot = random.choice(SPOTS)
+            text = json.dumps({"candidates": [
+                {"spot": spot, "confidence": round(random.uniform(0.55, 0.95), 2), "bbox": None},
+                {"spot": random.choice(SPOTS), "confidence": 0.2, "bbox": None},
+            ]}, ensure_ascii=False)
+        else:
+            text = NARRATION
+        response_id = f"resp_{uuid.uuid4().hex[:16]}"
+
+        await profile.delay()
+        failure = profile.fail()
+        if failure is not None:
+            return failure
+        if not body.get("stream"):
+            await asyncio.sleep(token_interval_s * len(text) / chars_per_token)
+            return _response_object(response_id, model, text)
+
+        async def events():
+            seq = 0
+            yield _sse({"type": "response.created", "sequence_number": seq,
+                        "response": _response_object(response_id, model, "", status="in_progress")})
+            for piece in _chunks(text, chars_per_token):
+                seq += 1
+                yield _sse({
+                    "type": "response.output_text.delta", "sequence_number": seq,
+                    "item_id": f"msg_{response_id}", "output_index": 0, "content_index": 0,
+                    "delta": piece, "logprobs": [],
+                })
+                await asyncio.sleep(token_interval_s)
+            seq += 1
+            yield _sse({"type": "response.completed", "sequence_number": seq,
+                        "response": _response_object(response_id, model, text)})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/audio/speech")
+    async def speech(request: Request):
+        body = await request.json()
+        text = body.get("input", "")
+        await tts.delay(scale=max(0.5, len(text) / 40))
+        failure = tts.fail()
+        if failure is not None:
+            return failure
+        return Response(content=random.randbytes(len(text) * TTS_BYTES_PER_CHAR), media_type="audio/mpeg")
+
+    return app
+
+
+# PostgREST operators the mappers use; anything else matches everything
+def _match(value: Any, op: str, arg: str) -> bool:
+    if op == "is":
+        return value is None if arg == "null" else str(value).lower() == arg
+    if op == "in":
+        return str(value) in [a.strip().strip('"') for a in arg.strip("()").split(",")]
+    if value is None:
+        return False
+    left, right = str(value), arg
+    try:
+        left_num, right_num = float(left), float(right)
+    except ValueError:
+        left_num = right_num = None  # type: ignore[assignment]
+    if left_num is not None:
+        left, right = left_num, right_num  # type: ignore[assignment]
+    return {
+        "eq": left == right, "neq": left != right,
+        "lt": left < right, "lte": left <= right,
+        "gt": left > right, "gte": left >= right,
+    }.get(op, True)
+
+
+class TableStore:
+    def __init__(self):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.objects: Dict[str, bytes] = {}
+
+    def select(self, table: str, params: List[tuple]) -> List[Dict[str, Any]]:
+        rows = self.tables.get(table, [])
+        order, limit, offset = None, None, 0
+        filters = []
+        for key, value in params:
+            if key == "select" or key == "on_conflict" or key == "columns":
+                continue
+            if key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif "." in value:
+                op, arg = value.split(".", 1)
+                filters.append((key, op, arg))
+        out = [r for r in rows if all(_match(r.get(k), op, arg) for k, op, arg in filters)]
+        if order:
+            for part in reversed(order.split(",")):
+                col, _, direction = part.partition(".")
+                out.sort(key=lambda r: (r.get(col) is None, str(r.get(col))), reverse=direction.startswith("desc"))
+        out = out[offset:]
+        return out[:limit] if limit is not None else out
+
+
+def create_supabase_app(profile: FaultProfile) -> FastAPI:
+    app = FastAPI(title="fake-supabase")
+    store = TableStore()
+    app.state.store = store
+
+    def _respond(request: Request, rows: List[Dict[str, Any]], status: int = 200) -> Response:
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(rows) != 1:
+                return JSONResponse(status_code=406, content={"code": "PGRST116", "message": "not exactly one row"})
+            return JSONResponse(status_code=status, content=rows[0])
+        headers = {"content-range": f"0-{max(0, len(rows) - 1)}/{len(rows)}"}
+        return JSONResponse(status_code=status, content=rows, headers=headers)
+
+    @app.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH", "DELETE"])
+    async def rest(table: str, request: Request):
+        await profile.delay()
+        failure = profile.fail()
+        if failure is not None:
+            return failure
+        params = list(request.query_params.multi_items())
+        if request.method == "GET":
+            return _respond(request, store.select(table, params))
+        if request.method == "POST":
+            body = await request.json()
+            rows = body if isinstance(body, list) else [body]
+            now = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+            for row in rows:
+                row.setdefault("id", str(uuid.uuid4()))
+                row.setdefault("created_at", now)
+            store.tables.setdefault(table, []).extend(rows)
+            return _respond(request, rows, status=201)
+        matched = store.select(table, params)
+        if request.method == "PATCH":
+            patch = await request.json()
+            for row in matched:
+                row.update(patch)
+            return _respond(request, matched)
+        ids = {id(r) for r in matched}
+        store.tables[table] = [r for r in store.tables.get(table, []) if id(r) not in ids]
+        return _respond(request, matched)
+
+    @app.post("/rest/v1/rpc/{fn}")
+    async def rpc(fn: str):
+        await profile.delay()
+        return []
+
+    @app.post("/storage/v1/object/list/{bucket}")
+    async def list_objects(bucket: str, request: Request):
+        await profile.delay()
+        body = await request.json()
+        prefix = f"{bucket}/{body.get('prefix', '')}".rstrip("/") + "/"
+        names = [k[len(prefix):] for k in store.objects if k.startswith(prefix)]
+        limit, offset = int(body.get("limit", 100)), int(body.get("offset", 0))
+        return [{"name": n, "id": n, "created_at": None, "metadata": {}} for n in names[offset:offset + limit]]
+
+    @app.api_route("/storage/v1/object/{bucket}/{path:path}", methods=["POST", "PUT"])
+    async def upload(bucket: str, path: str, request: Request):
+        await profile.delay()
+        failure = profile.fail()
+        if failure is not None:
+            return failure
+        store.objects[f"{bucket}/{path}"] = await request.body()
+        return {"Key": f"{bucket}/{path}", "Id": str(uuid.uuid4())}
+
+    @app.get("/storage/v1/object/{bucket}/{path:path}")
+    async def download(bucket: str, path: str):
+        await profile.delay()
+        data = store.objects.get(f"{bucket}/{path}")
+        if data is None:
+            return JSONResponse(status_code=404, content={"statusCode": "404", "error": "not_found", "message": "Object not found"})
+        return Response(content=data, media_type="audio/mpeg")
+
+    @app.delete("/storage/v1/object/{bucket}")
+    async def remove(bucket: str, request: Request):
+        await profile.delay()
+        body = await request.json()
+        removed = []
+        for name in body.get("prefixes", []):
+            if store.objects.pop(f"{bucket}/{name}", None) is not None:
+                removed.append({"name": name})
+        return removed
+
+    return app
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    """Fault-profile flags shared with loadtest.run"""
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="time to first token (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--token-interval", type=float, default=0.02, help="seconds between streamed deltas")
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="per ~40 input characters (s)")
+    parser.add_argument("--tts-jitter", type=float, default=0.1)
+    parser.add_argument("--tts-error-rate", type=float, default=0.0)
+    parser.add_argument("--db-latency", type=float, default=0.03)
+    parser.add_argument("--db-jitter", type=float, default=0.02)
+    parser.add_argument("--db-error-rate", type=float, default=0.0)
+
+
+def profile_argv(args: argparse.Namespace) -> List[str]:
+    names = ["llm_latency", "llm_jitter", "llm_error_rate", "token_interval",
+             "tts_latency", "tts_jitter", "tts_error_rate", "db_latency", "db_jitter", "db_error_rate"]
+    argv: List[str] = []
+    for name in names:
+        argv += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    return argv
+
+
+async def serve(args: argparse.Namespace) -> None:
+    openai_app = create_openai_app(
+        FaultProfile(args.llm_latency, args.llm_jitter, args.llm_error_rate),
+        FaultProfile(args.tts_latency, args.tts_jitter, args.tts_error_rate),
+        token_interval_s=args.token_interval,
+    )
+    supabase_app = create_supabase_app(FaultProfile(args.db_latency, args.db_jitter, args.db_error_rate))
+    servers = [
+        uvicorn.Server(uvicorn.Config(openai_app, host=args.host, port=args.openai_port, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(supabase_app, host=args.host, port=args.supabase_port, log_level="warning")),
+    ]
+    await asyncio.gather(*(s.serve() for s in servers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI + Supabase upstreams for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--openai-port", type=int, default=18001)
+    parser.add_argument("--supabase-port", type=int, default=18002)
+    add_profile_args(parser)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 # src/api/deps.py
+import hashlib
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 from supabase import Client
 
+from ..core.config import settings
 from ..core.supabase import supabase_admin, supabase_anon
+from ..services.cache import cache
 from ..mappers.user_mapper import UserMapper
 from ..mappers.device_mapper import DeviceMapper
 from ..mappers.guide_mapper import GuideMapper
@@ -61,6 +64,7 @@ async def get_current_user(
     1) 先用 get_user(jwt) 验证（服务端校验 JWT）
     2) 若失败且 Cookie 有 refresh_token，尝试 refresh；成功后在响应头写 'X-New-Access-Token'
     3) 返回 public.users 里的 profile
+    token -> profile 在共享缓存中保留 AUTH_CACHE_TTL_S 秒（只缓存成功结果）
     """
     def _cred_exc():
         return HTTPException(
@@ -69,7 +73,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    try:
+    async def _load_profile() -> dict:
         auth_resp = supabase_anon.auth.get_user(token)
         auth_user = auth_resp.user
         if not auth_user:
@@ -77,7 +81,13 @@ async def get_current_user(
         user_profile = await user_mapper.get_user_by_id(str(auth_user.id))
         if not user_profile:
             raise HTTPException(status_code=404, detail="User profile not found.")
-        return user_schema.User.model_validate(user_profile)
+        return user_schema.User.model_validate(user_profile).model_dump(mode="json")
+
+    try:
+        # Keyed by a digest so raw tokens never reach the cache backend
+        token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        profile = await cache.get_or_load_json("auth", token_key, _load_profile, settings.AUTH_CACHE_TTL_S)
+        return user_schema.User.model_validate(profile)
     except Exception:
         if request is not None:
             refresh_token = request.cookies.get(COOKIE_NAME)
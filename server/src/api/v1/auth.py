@@ -7,8 +7,6 @@ import hashlib
 import hmac
 from datetime import datetime, timedelta
 import pytz
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
 import re
 
 from ...controllers.auth_controller import AuthController
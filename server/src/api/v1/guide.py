@@ -1,14 +1,29 @@
 # src/api/v1/guide.py
+import asyncio
+import base64
+import hashlib
+import time
 import uuid
 import json
-from typing import Dict, Any
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+import re
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, BackgroundTasks, Header, Query
+from fastapi.responses import JSONResponse, Response
 import logging
 
 from ...schemas import guide as guide_schemas
-from ...services.vision import vision_service
+from ...services.vision import vision_service, VisionResult
+from ...services.image_preprocess import image_preprocessor, ImagePreprocessError
+from ...services.recognition_cache import hamming
+from ...core.geo import distance_m
+from ...services.landmark_index import landmark_index
 from ...services.orchestrator import NarrativeOrchestrator
+from ...services.guide_sessions import guide_sessions, GuideSession, ResumePoint, SessionUnavailable
+from ...services.admission import admission, AdmissionRejected
+from ...services.cache import cache
+from ...core.metrics import IDENTIFY_S, WS_ACTIVE
 from ...mappers.guide_mapper import GuideMapper
 from ..deps import get_guide_mapper
 from ...core.supabase import supabase_admin
@@ -29,6 +44,20 @@ async def identify(
     This endpoint processes an uploaded image along with GPS coordinates
     to identify possible locations or landmarks.
     """
+    try:
+        # Shed before any image work; a rejection is just a dict lookup
+        admission.admit_identify(request.deviceId)
+    except AdmissionRejected as e:
+        logger.info("POST /guide/identify shed", extra={"deviceId": request.deviceId, "reason": e.reason})
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(max(1, round(e.retry_after_s)))},
+            content={
+                "identifyId": "",
+                "candidates": [],
+                "error": {"type": "rate_limit", "message": e.reason, "retryAfterMs": e.retry_after_ms},
+            },
+        )
     try:
         logger.info("POST /guide/identify start", extra={
             "deviceId": request.deviceId,
@@ -36,12 +65,15 @@ async def identify(
             "lng": request.geo.lng,
             "accuracyM": request.geo.accuracyM,
         })
+        started = time.monotonic()
+        deadline = started + settings.IDENTIFY_DEADLINE_S
         # Generate unique identify session ID
         identify_id = f"id_{uuid.uuid4().hex[:12]}"
         
         # Call vision service to identify location
         try:
-            candidates = await vision_service.identify_location(request)
+            result = await vision_service.identify(request, deadline=deadline)
+            candidates = result.candidates
         except vision_service.VisionAPIError as e:  # type: ignore[attr-defined]
             logger.warning("Vision identify failed", extra={"error": str(e)})
             # Surface error to client
@@ -50,51 +82,29 @@ async def identify(
                 "candidates": [],
                 "error": {"type": "vision", "message": str(e)}
             })
-        try:
-            cand_summary = [
-                {
-                    "spot": c.spot,
-                    "confidence": c.confidence,
-                    "bbox": c.bbox,
-                }
+        # Serialised by the log formatter, off the event loop
+        logger.info("Vision candidates returned", extra={
+            "identifyId": identify_id,
+            "num": len(candidates or []),
+            "candidates": [
+                {"spot": c.spot, "confidence": c.confidence, "bbox": c.bbox}
                 for c in (candidates or [])
-            ]
-            logger.info(
-                f"Vision candidates returned identifyId={identify_id} num={len(candidates or [])} data={json.dumps(cand_summary, ensure_ascii=False)}"
-            )
-        except Exception:
-            logger.info(
-                f"Vision candidates returned identifyId={identify_id} num={len(candidates or [])} (unprintable candidates)"
-            )
+            ],
+        })
         
         # Store the identify session in database strictly after responding
         best_candidate = candidates[0] if candidates else None
-        async def _persist_identify():
-            try:
-                await mapper.create_identify_session(
-                    identify_id=identify_id,
-                    device_id=request.deviceId,
-                    lat=request.geo.lat,
-                    lng=request.geo.lng,
-                    accuracy_m=request.geo.accuracyM,
-                    spot=best_candidate.spot if best_candidate else None,
-                    confidence=best_candidate.confidence if best_candidate else None,
-                    bbox=best_candidate.bbox if best_candidate else None,
-                )
-                logger.info("identify session created (async)", extra={"identifyId": identify_id})
-            except Exception as e:
-                logger.exception(f"persist identify session failed: {e}")
         if background_tasks is not None:
-            background_tasks.add_task(_persist_identify)
+            background_tasks.add_task(_persist_identify, mapper, identify_id, request.deviceId, request.geo, result)
         else:
             # Fallback: still schedule without blocking the response
-            import asyncio as _asyncio
-            _asyncio.create_task(_persist_identify())
+            asyncio.create_task(_persist_identify(mapper, identify_id, request.deviceId, request.geo, result))
         
         response = guide_schemas.IdentifyResponse(
             identifyId=identify_id,
             candidates=candidates
         )
+        IDENTIFY_S.labels(result.source).observe(time.monotonic() - started)
         logger.info("POST /guide/identify success", extra={
             "identifyId": identify_id,
             "bestSpot": best_candidate.spot if best_candidate else None,
@@ -109,6 +119,301 @@ async def identify(
             detail="Failed to identify location"
         )
 
+async def _persist_identify(
+    mapper: GuideMapper,
+    identify_id: str,
+    device_id: str,
+    geo: guide_schemas.Geo,
+    result: VisionResult,
+):
+    """Store an identify session and feed vision answers to the landmark index
+
+    When the fast vision pass was unsure, the high-detail pass runs here and its
+    answer replaces the stored one, so a stream init for this identifyId uses it.
+    """
+    best_candidate = result.candidates[0] if result.candidates else None
+    escalation: Optional[asyncio.Task] = None
+    if result.escalation is not None:
+        escalation = asyncio.ensure_future(result.escalation())
+        vision_service.track_escalation(identify_id, escalation)
+    try:
+        await mapper.create_identify_session(
+            identify_id=identify_id,
+            device_id=device_id,
+            lat=geo.lat,
+            lng=geo.lng,
+            accuracy_m=geo.accuracyM,
+            spot=best_candidate.spot if best_candidate else None,
+            confidence=best_candidate.confidence if best_candidate else None,
+            bbox=best_candidate.bbox if best_candidate else None,
+            source=result.source,
+        )
+        logger.info("identify session created (async)", extra={"identifyId": identify_id})
+        if best_candidate and result.source == "vision":
+            landmark_index.add(identify_id, geo.lat, geo.lng, best_candidate.spot, best_candidate.confidence)
+        if escalation is not None:
+            improved = await escalation
+            best = improved.candidates[0] if improved.candidates else None
+            if best and (best_candidate is None or (best.spot, best.confidence) != (best_candidate.spot, best_candidate.confidence)):
+                await mapper.update_identify_session(identify_id, spot=best.spot, confidence=best.confidence, bbox=best.bbox)
+                landmark_index.add(identify_id, geo.lat, geo.lng, best.spot, best.confidence)
+    except Exception as e:
+        logger.exception(f"persist identify session failed: {e}")
+
+class _LatestFrame:
+    """Single-slot mailbox: a new frame replaces any frame not yet taken"""
+
+    def __init__(self):
+        self.frame: Optional[bytes] = None
+        self.event = asyncio.Event()
+        self.received = 0
+        self.superseded = 0
+
+    def offer(self, frame: bytes) -> None:
+        self.received += 1
+        if self.frame is not None:
+            self.superseded += 1
+        self.frame = frame
+        self.event.set()
+
+    async def take(self) -> bytes:
+        await self.event.wait()
+        self.event.clear()
+        frame, self.frame = self.frame, None
+        return frame
+
+@router.websocket("/identify/ws")
+async def identify_stream(websocket: WebSocket):
+    """
+    WebSocket endpoint for continuous identification
+    
+    The client sends a `start` message, then camera frames as binary JPEG
+    messages. Only the latest frame is identified: frames arriving while a
+    vision call is in flight replace each other, and frames that look the same
+    as the last identified one (perceptual hash) are skipped. A `candidates`
+    message is pushed whenever the result changes.
+    """
+    await websocket.accept()
+    WS_ACTIVE.labels("identify").inc()
+    conn_id = uuid.uuid4().hex[:8]
+    ws_logger = logging.getLogger("ws.identify")
+    ws_logger.info(f"WS-ID[{conn_id}] connected")
+    slot = _LatestFrame()
+    state: Dict[str, Any] = {"start": None, "geo": None}
+    worker: Optional[asyncio.Task] = None
+
+    async def _send_error(code: str, message: str, details: Optional[Dict[str, Any]] = None):
+        try:
+            err = guide_schemas.ErrorMessage(type="error", code=code, message=message, details=details)
+            await websocket.send_json(err.model_dump(exclude_none=True))
+        except Exception:
+            pass
+
+    async def _worker():
+        mapper = GuideMapper(supabase_admin)
+        last_hash: Optional[int] = None
+        last_geo: Optional[guide_schemas.Geo] = None
+        last_key = None
+        skipped = 0
+        try:
+            while True:
+                frame = await slot.take()
+                geo = state["geo"]
+                try:
+                    processed = await image_preprocessor.process(frame)
+                except ImagePreprocessError as e:
+                    await _send_error("BAD_FRAME", str(e))
+                    continue
+                if (
+                    last_hash is not None
+                    and hamming(processed.phash, last_hash) <= settings.IDENTIFY_WS_UNCHANGED_DISTANCE
+                    and distance_m(geo.lat, geo.lng, last_geo.lat, last_geo.lng) < settings.IDENTIFY_WS_UNCHANGED_MOVE_M
+                ):
+                    skipped += 1
+                    ws_logger.debug(f"WS-ID[{conn_id}] unchanged frame skipped", extra={"skipped": skipped})
+                    continue
+                try:
+                    # Same per-device budget as POST /identify, charged per vision call
+                    admission.admit_identify(state["start"].deviceId)
+                except AdmissionRejected as e:
+                    await _send_error("RATE_LIMITED", e.reason, {"retryAfterMs": e.retry_after_ms})
+                    continue
+                try:
+                    deadline = time.monotonic() + settings.IDENTIFY_DEADLINE_S
+                    result = await vision_service.identify_processed(processed, geo, deadline=deadline)
+                except vision_service.VisionAPIError as e:  # type: ignore[attr-defined]
+                    await _send_error("VISION_ERROR", str(e))
+                    continue
+                if result.source == "timeout":
+                    # Leave last_hash alone so the next frame is retried
+                    continue
+                if result.source != "degraded":
+                    # Degraded answers are retried on the next frame once vision recovers
+                    last_hash, last_geo = processed.phash, geo
+                key = tuple((c.spot, round(c.confidence, 1)) for c in result.candidates)
+                if key == last_key:
+                    continue
+                last_key = key
+                identify_id = f"id_{uuid.uuid4().hex[:12]}"
+                message = guide_schemas.CandidatesMessage(
+                    type="candidates",
+                    identifyId=identify_id,
+                    candidates=result.candidates,
+                    source=result.source,
+                )
+                await websocket.send_json(message.model_dump())
+                ws_logger.info(f"WS-ID[{conn_id}] candidates pushed", extra={
+                    "identifyId": identify_id,
+                    "num": len(result.candidates),
+                    "source": result.source,
+                })
+                asyncio.create_task(_persist_identify(mapper, identify_id, state["start"].deviceId, geo, result))
+        except WebSocketDisconnect:
+            # Socket gone; the receive loop handles cleanup
+            ws_logger.info(f"WS-ID[{conn_id}] worker stopped, socket closed")
+        except Exception as e:
+            # Frames would pile up unprocessed; tell the client and end the connection
+            ws_logger.exception(f"WS-ID[{conn_id}] worker failed: {e}")
+            await _send_error("INTERNAL_ERROR", "Identification stopped")
+            try:
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            frame = message.get("bytes")
+            if frame is not None:
+                if worker is not None and worker.done():
+                    break  # the worker failed and already reported it
+                if state["start"] is None:
+                    await _send_error("NOT_STARTED", "Send a start message before frames")
+                elif len(frame) > settings.IDENTIFY_WS_MAX_FRAME_BYTES:
+                    await _send_error("FRAME_TOO_LARGE", f"Frame exceeds {settings.IDENTIFY_WS_MAX_FRAME_BYTES} bytes")
+                else:
+                    slot.offer(frame)
+                continue
+
+            try:
+                message_data = json.loads(message.get("text") or "")
+                message_type = message_data.get("type")
+                if message_type == "start":
+                    start = guide_schemas.IdentifyStartMessage(**message_data)
+                    try:
+                        admission.admit_identify(start.deviceId)
+                    except AdmissionRejected as e:
+                        ws_logger.info(f"WS-ID[{conn_id}] start shed", extra={"deviceId": start.deviceId, "reason": e.reason})
+                        await _send_error("RATE_LIMITED", e.reason, {"retryAfterMs": e.retry_after_ms})
+                        continue
+                    state["start"], state["geo"] = start, start.geo
+                    ws_logger.info(f"WS-ID[{conn_id}] start", extra={"deviceId": start.deviceId})
+                    if worker is None:
+                        worker = asyncio.create_task(_worker())
+                elif message_type == "geo":
+                    state["geo"] = guide_schemas.GeoUpdateMessage(**message_data).geo
+                elif message_type == "ping":
+                    await websocket.send_json({"type": "pong", "ts": int(time.time() * 1000)})
+                elif message_type == "close":
+                    break
+                else:
+                    await _send_error("UNKNOWN_MESSAGE_TYPE", f"Unknown message type: {message_type}")
+            except (ValueError, AttributeError) as e:
+                await _send_error("BAD_MESSAGE", str(e))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        ws_logger.exception(f"WS-ID[{conn_id}] unexpected error: {e}")
+    finally:
+        WS_ACTIVE.labels("identify").dec()
+        if worker is not None:
+            worker.cancel()
+        ws_logger.info(f"WS-ID[{conn_id}] closed", extra={
+            "frames": slot.received,
+            "superseded": slot.superseded,
+        })
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+def _guide_start_enabled() -> bool:
+    if settings.GUIDE_START_ENABLED is not None:
+        return settings.GUIDE_START_ENABLED
+    return settings.WEB_CONCURRENCY <= 1
+
+@router.post("/start", status_code=202, response_model=guide_schemas.GuideStartResponse)
+async def start_guide(request: guide_schemas.GuideStartRequest):
+    """
+    Start generating a guide before the client connects
+
+    Returns at once with a stream ID; the orchestrator runs in the background
+    and /guide/stream/{stream_id} delivers everything produced since start,
+    so the WebSocket handshake overlaps with model latency. The stream lives
+    in this worker only, so the endpoint answers 503 unless the deployment
+    runs one worker per instance (see GUIDE_START_ENABLED).
+    """
+    if not _guide_start_enabled():
+        # Several workers share this port; the WebSocket would likely land on a
+        # worker that does not hold the stream while this one generates for nobody
+        return JSONResponse(
+            status_code=503,
+            content={"error": {"type": "unavailable", "message": "guide/start is disabled on multi-worker servers; use the stream init message"}},
+        )
+    try:
+        session = _start_guide(request.to_init())
+    except AdmissionRejected as e:
+        logger.info("POST /guide/start shed", extra={"deviceId": request.deviceId, "reason": e.reason})
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(max(1, round(e.retry_after_s)))},
+            content={"error": {"type": "rate_limit", "message": e.reason, "retryAfterMs": e.retry_after_ms}},
+        )
+    logger.info("POST /guide/start", extra={
+        "deviceId": request.deviceId,
+        "guideId": session.guide_id,
+        "hasIdentifyId": bool(request.identifyId),
+    })
+    return guide_schemas.GuideStartResponse(
+        streamId=session.guide_id,
+        websocketUrl=f"/api/v1/guide/stream/{session.guide_id}",
+    )
+
+@router.websocket("/stream/{stream_id}")
+async def guide_stream_subscribe(websocket: WebSocket, stream_id: str, lastSeq: Optional[int] = None, textOffset: int = 0):
+    """
+    WebSocket subscription to a guide started with POST /guide/start
+
+    Sends the frames produced so far, then live frames until `eos`. A client
+    reconnecting mid-guide passes lastSeq / textOffset to get only what it is
+    missing.
+    """
+    await websocket.accept()
+    WS_ACTIVE.labels("guide").inc()
+    ws_logger = logging.getLogger("ws.guide")
+    try:
+        session = guide_sessions.get(stream_id)
+        if session is None:
+            err = guide_schemas.ErrorMessage(type="error", code="STREAM_NOT_FOUND", message="Unknown or expired stream")
+            await websocket.send_json(err.model_dump())
+            return
+        position = None
+        if lastSeq is not None or textOffset:
+            position = ResumePoint(last_seq=-1 if lastSeq is None else lastSeq, text_offset=textOffset)
+        ws_logger.info("stream subscribed", extra={"guideId": stream_id, "resume": position is not None})
+        if not await session.serve(websocket, position):
+            ws_logger.info("stream subscriber dropped, kept for resume", extra={"guideId": stream_id})
+    except Exception as e:
+        ws_logger.exception(f"stream subscription error: {e}")
+    finally:
+        WS_ACTIVE.labels("guide").dec()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
 @router.websocket("/stream")
 async def guide_stream(websocket: WebSocket):
     """
@@ -118,13 +423,12 @@ async def guide_stream(websocket: WebSocket):
     including text and audio segments.
     """
     await websocket.accept()
+    WS_ACTIVE.labels("guide").inc()
     conn_id = uuid.uuid4().hex[:8]
     ws_logger = logging.getLogger("ws.guide")
     ws_logger.info(f"WS[{conn_id}] connected")
     
     try:
-        orchestrator = None
-        
         while True:
             # Receive message from client
             try:
@@ -145,10 +449,21 @@ async def guide_stream(websocket: WebSocket):
                         "lng": init_message.geo.lng,
                         "hasIdentifyId": bool(init_message.identifyId),
                     })
-                    # Create orchestrator and start streaming
-                    orchestrator = NarrativeOrchestrator(websocket, init_message)
-                    await orchestrator.stream()
+                    # Admission is checked before the image is touched
+                    session = _start_guide(init_message)
+                    if not await session.serve(websocket):
+                        ws_logger.info(f"WS[{conn_id}] dropped mid-guide, kept for resume", extra={"guideId": session.guide_id})
+                        break
                     
+                except AdmissionRejected as e:
+                    ws_logger.info(f"WS[{conn_id}] init shed", extra={"reason": e.reason})
+                    err = guide_schemas.ErrorMessage(
+                        type="error",
+                        code="RATE_LIMITED",
+                        message=e.reason,
+                        details={"retryAfterMs": e.retry_after_ms},
+                    )
+                    await websocket.send_json(err.model_dump())
                 except Exception as e:
                     ws_logger.exception(f"WS[{conn_id}] init handling error: {e}")
                     err = {
@@ -177,6 +492,67 @@ async def guide_stream(websocket: WebSocket):
                     ws_logger.error(f"WS[{conn_id}] send -> {err}")
                     await websocket.send_json(err)
                     
+            elif message_type == "resume":
+                try:
+                    resume_message = guide_schemas.ResumeMessage(**message_data)
+                    ws_logger.info(f"WS[{conn_id}] resume request", extra={
+                        "guideId": resume_message.guideId,
+                        "lastSeq": resume_message.lastSeq,
+                        "textOffset": resume_message.textOffset,
+                    })
+                    session = guide_sessions.resume(resume_message.guideId)
+                    if session is None:
+                        # Expired or owned by another worker; storage still has the audio
+                        err = guide_schemas.ErrorMessage(
+                            type="error",
+                            code="RESUME_NOT_FOUND",
+                            message="Guide session expired; use replay",
+                        )
+                        await websocket.send_json(err.model_dump())
+                        continue
+                    resumed = guide_schemas.ResumedMessage(type="resumed", guideId=session.guide_id, done=session.done)
+                    await websocket.send_json(resumed.model_dump())
+                    position = ResumePoint(last_seq=resume_message.lastSeq, text_offset=resume_message.textOffset)
+                    if not await session.serve(websocket, position):
+                        ws_logger.info(f"WS[{conn_id}] dropped again after resume", extra={"guideId": session.guide_id})
+                        break
+                except WebSocketDisconnect:
+                    raise
+                except Exception as e:
+                    ws_logger.exception(f"WS[{conn_id}] resume handling error: {e}")
+                    err = {
+                        "type": "error",
+                        "code": "RESUME_ERROR",
+                        "message": f"Failed to resume guide: {str(e)}"
+                    }
+                    ws_logger.error(f"WS[{conn_id}] send -> {err}")
+                    await websocket.send_json(err)
+                    
+            elif message_type == "join":
+                try:
+                    join_message = guide_schemas.JoinMessage(**message_data)
+                    ws_logger.info(f"WS[{conn_id}] join request", extra={
+                        "guideId": join_message.guideId,
+                        "deviceId": join_message.deviceId,
+                    })
+                    # No admission slot: listeners share the originator's generation
+                    session = guide_sessions.join(join_message.guideId)
+                    if not await session.serve(websocket):
+                        ws_logger.info(f"WS[{conn_id}] listener dropped", extra={"guideId": session.guide_id})
+                        break
+                except SessionUnavailable as e:
+                    err = guide_schemas.ErrorMessage(type="error", code=e.code, message=e.message)
+                    await websocket.send_json(err.model_dump())
+                except Exception as e:
+                    ws_logger.exception(f"WS[{conn_id}] join handling error: {e}")
+                    err = {
+                        "type": "error",
+                        "code": "JOIN_ERROR",
+                        "message": f"Failed to join guide: {str(e)}"
+                    }
+                    ws_logger.error(f"WS[{conn_id}] send -> {err}")
+                    await websocket.send_json(err)
+                    
             elif message_type == "nack":
                 try:
                     nack_message = guide_schemas.NackMessage(**message_data)
@@ -238,11 +614,30 @@ async def guide_stream(websocket: WebSocket):
         except:
             pass  # Connection might be closed
     finally:
+        WS_ACTIVE.labels("guide").dec()
         try:
             await websocket.close()
         except:
             pass
 
+def _start_guide(init_message: guide_schemas.InitMessage) -> GuideSession:
+    """Admit and start a guide generation; raises AdmissionRejected.
+
+    The admission slot is held by the generation task, not the socket, so a
+    guide that keeps running for a resuming client still counts against the
+    device and worker budgets.
+    """
+    slot = ExitStack()
+    slot.enter_context(admission.orchestration(init_message.deviceId))
+    try:
+        session = guide_sessions.create(init_message.deviceId)
+        orchestrator = NarrativeOrchestrator(session, init_message)
+        session.run(orchestrator.stream(), cleanup=slot.close)
+    except BaseException:
+        slot.close()
+        raise
+    return session
+
 async def handle_replay(websocket: WebSocket, replay_message: guide_schemas.ReplayMessage):
     """
     Handle replay request for a specific guide
@@ -259,7 +654,12 @@ async def handle_replay(websocket: WebSocket, replay_message: guide_schemas.Repl
 
         segments = await mapper.get_guide_segments(guide_id)
         if not segments:
-            err = {"type": "error", "code": "NOT_FOUND", "message": "Guide not found"}
+            guide = await mapper.get_guide(guide_id)
+            if guide is not None and guide.audio_expired:
+                # Transcript is still in history; only the audio passed retention
+                err = {"type": "error", "code": "AUDIO_EXPIRED", "message": "Guide audio expired"}
+            else:
+                err = {"type": "error", "code": "NOT_FOUND", "message": "Guide not found"}
             logging.getLogger("ws.guide.replay").error(f"send -> {err}")
             await websocket.send_json(err)
             return
@@ -269,8 +669,13 @@ async def handle_replay(websocket: WebSocket, replay_message: guide_schemas.Repl
             # Stream segments whose end is after the desired start time
             if segment.end_ms is None or segment.end_ms > from_ms:
                 try:
-                    resp = supabase_admin.storage.from_(settings.SUPABASE_STORAGE_BUCKET_AUDIO).download(segment.object_key)
-                    audio_bytes = resp
+                    async def _download(object_key: str = segment.object_key) -> bytes:
+                        return supabase_admin.storage.from_(settings.SUPABASE_STORAGE_BUCKET_AUDIO).download(object_key)
+
+                    # Written through by the orchestrator; replays rarely reach storage
+                    audio_bytes = await cache.get_or_load_bytes(
+                        "audio", segment.object_key, _download, settings.AUDIO_CACHE_TTL_S,
+                    )
                     # Minimal header: client should reuse same header format
                     header = json.dumps({
                         "seq": segment.seq,
@@ -317,46 +722,81 @@ async def handle_nack(websocket: WebSocket, nack_message: guide_schemas.NackMess
         logging.getLogger("ws.guide.nack").exception(f"Error handling NACK: {e}")
         raise
 
-@router.get("/guides/{device_id}")
+def _encode_cursor(created_at: str, guide_id: str) -> str:
+    raw = json.dumps([created_at, guide_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+# guide ids as minted by guide_sessions; the cursor value goes into a PostgREST filter
+GUIDE_ID_REGEX = re.compile(r"guide_[0-9a-f]{12}")
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, guide_id = json.loads(raw)
+        datetime.fromisoformat(created_at)  # reject anything that is not a timestamp
+        if not isinstance(guide_id, str) or not GUIDE_ID_REGEX.fullmatch(guide_id):
+            raise ValueError("guide_id")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, guide_id
+
+@router.get("/guides/{device_id}", response_model=guide_schemas.GuideListResponse)
 async def get_device_guides(
     device_id: str,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     mapper: GuideMapper = Depends(get_guide_mapper)
 ):
     """
-    Get guides for a specific device
+    Get guides for a specific device, newest first
     
     Args:
         device_id: Device identifier
-        limit: Maximum number of guides to return
+        limit: Page size
+        cursor: nextCursor from the previous page
         
     Returns:
-        List of guides for the device
+        One page of guides and the cursor of the next one. The ETag covers
+        the page body; a matching If-None-Match gets 304 without a body.
     """
+    before = _decode_cursor(cursor) if cursor else None
     try:
-        guides = await mapper.get_guides_by_device(device_id, limit)
-        
-        # Convert to response format
-        guide_responses = []
-        for guide in guides:
-            guide_responses.append({
-                "guideId": guide.guide_id,
-                "spot": guide.spot,
-                "title": guide.title,
-                "confidence": guide.confidence,
-                "durationMs": guide.duration_ms,
-                "createdAt": guide.created_at.isoformat() if guide.created_at else None
-            })
-        
-        return {"guides": guide_responses}
-        
+        # One extra row tells whether another page exists
+        guides = await mapper.get_guides_by_device(device_id, limit + 1, before)
     except Exception as e:
-        print(f"Error getting device guides: {e}")
+        logger.exception(f"Error getting device guides: {e}")
         raise HTTPException(
             status_code=500,
             detail="Failed to retrieve guides"
         )
 
+    page = guides[:limit]
+    next_cursor = None
+    if len(guides) > limit and page[-1].created_at is not None:
+        next_cursor = _encode_cursor(page[-1].created_at.isoformat(), page[-1].guide_id)
+    body = guide_schemas.GuideListResponse(
+        guides=[
+            guide_schemas.GuideSummary(
+                guideId=guide.guide_id,
+                spot=guide.spot,
+                title=guide.title,
+                confidence=guide.confidence,
+                durationMs=guide.duration_ms,
+                audioExpired=guide.audio_expired,
+                createdAt=guide.created_at.isoformat() if guide.created_at else None,
+            )
+            for guide in page
+        ],
+        nextCursor=next_cursor,
+    ).model_dump_json().encode("utf-8")
+
+    etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.get("/guides/{guide_id}/segments")
 async def get_guide_segments(
     guide_id: str,
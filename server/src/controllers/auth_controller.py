@@ -1,8 +1,6 @@
 # src/controllers/auth_controller.py
 
 from typing import Optional
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
 
 from supabase import Client
 
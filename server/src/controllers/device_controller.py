@@ -1,6 +1,6 @@
 # src/controllers/device_controller.py
 import uuid
-from typing import Optional
+from typing import Optional, Iterable
 
 from ..mappers.device_mapper import DeviceMapper
 from ..schemas.devices import DeviceRegisterResponse, DeviceDeleteResponse
@@ -71,4 +71,22 @@ class DeviceController:
         """
         Disable a device (used when push notifications fail).
         """
-        return await self.device_mapper.disable_device(push_token)
\ No newline at end of file
+        return await self.device_mapper.disable_device(push_token)
+    
+    async def disable_devices(self, push_tokens: Iterable[str]) -> int:
+        """
+        Disable many devices in bulk (e.g. DeviceNotRegistered push receipts).
+        """
+        return await self.device_mapper.disable_devices(push_tokens)
+    
+    async def enable_devices(self, push_tokens: Iterable[str]) -> int:
+        """
+        Re-enable many devices in bulk.
+        """
+        return await self.device_mapper.enable_devices(push_tokens)
+    
+    async def delete_devices(self, push_tokens: Iterable[str]) -> int:
+        """
+        Delete many devices in bulk.
+        """
+        return await self.device_mapper.delete_devices(push_tokens)
@@ -1,6 +1,6 @@
 # src/core/config.py
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 class Settings(BaseSettings):
     # Supabase Configuration
@@ -20,8 +20,146 @@ class Settings(BaseSettings):
     # Guide Service Configuration
     SUPABASE_STORAGE_BUCKET_AUDIO: str = "audio-seg"
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible endpoint (proxy, local stand-in)
     TTS_API_KEY: str
-    
+
+    # Image preprocessing before vision / LLM calls
+    IMAGE_PREPROCESS_ENABLED: bool = True
+    IMAGE_MAX_EDGE_PX: int = 1024
+    IMAGE_JPEG_QUALITY: int = 80
+    IMAGE_PREPROCESS_WORKERS: int = 2
+
+    # Near-duplicate recognition cache for /guide/identify
+    RECOGNITION_CACHE_ENABLED: bool = True
+    RECOGNITION_CACHE_TTL_S: int = 600
+    RECOGNITION_CACHE_MAX_DISTANCE: int = 6  # Hamming bits out of 64
+    RECOGNITION_CACHE_GEOHASH_PRECISION: int = 6  # ~1.2km x 0.6km cells
+    RECOGNITION_CACHE_MAX_ENTRIES_PER_CELL: int = 256
+    RECOGNITION_CACHE_MAX_CELLS: int = 2048
+
+    # Landmark prior index built from past identify sessions
+    LANDMARK_PRIOR_ENABLED: bool = True
+    LANDMARK_PRIOR_REFRESH_S: int = 60
+    LANDMARK_PRIOR_LOOKBACK_DAYS: int = 7
+    LANDMARK_PRIOR_MIN_CONFIDENCE: float = 0.8
+    LANDMARK_PRIOR_MAX_ACCURACY_M: int = 100
+    LANDMARK_PRIOR_MIN_RADIUS_M: float = 30.0
+    LANDMARK_PRIOR_MIN_SUPPORT: int = 5  # answer from the index at/above this many matches
+    LANDMARK_PRIOR_MIN_SHARE: float = 0.8
+    LANDMARK_PRIOR_HINT_SUPPORT: int = 2  # below MIN_SUPPORT, pass the prior into the prompt
+
+    # Vision calls: per-request deadline and hedging past the rolling latency percentile
+    VISION_MODEL: str = "gpt-5-nano"
+    VISION_HEDGE_MODEL: Optional[str] = None  # extra default route; hedges go to the runner-up route
+    VISION_HEDGE_ENABLED: bool = True
+    VISION_HEDGE_PERCENTILE: float = 0.9
+    VISION_HEDGE_MIN_DELAY_S: float = 1.0
+    VISION_HEDGE_DEFAULT_DELAY_S: float = 4.0  # until VISION_HEDGE_MIN_SAMPLES are seen
+    VISION_HEDGE_MIN_SAMPLES: int = 20
+    VISION_LATENCY_WINDOW: int = 200
+    IDENTIFY_DEADLINE_S: float = 12.0
+    VISION_EARLY_RETURN_CONFIDENCE: float = 0.8  # stop reading the stream at the first such candidate
+    # Tiered recognition: low-detail fast pass, high-detail pass only below the threshold
+    VISION_TIERED_ENABLED: bool = True
+    VISION_FAST_MAX_EDGE_PX: int = 512
+    VISION_ESCALATE_BELOW_CONFIDENCE: float = 0.6
+    VISION_ESCALATE_IN_BACKGROUND: bool = True
+    VISION_ESCALATION_WAIT_S: float = 2.0  # how long stream init waits for a running escalation
+
+    # LLM routing across providers/models. LLM_ROUTES is a JSON list of
+    # {"provider", "model", "api_key_env"?, "api_base"?, "regions"?, "vision"?, "openai_options"?};
+    # empty means OpenAI with VISION_MODEL (+ VISION_HEDGE_MODEL)
+    LLM_ROUTES: List[Dict[str, Any]] = []
+    LLM_REGION: Optional[str] = None  # deployment region, matched against route regions
+    LLM_ROUTER_EWMA_ALPHA: float = 0.2
+    LLM_ROUTER_MAX_ERROR_RATE: float = 0.5
+    LLM_ROUTER_COOLDOWN_S: float = 30.0
+    LLM_ROUTER_DEFAULT_LATENCY_S: float = 3.0  # assumed for routes without samples yet
+
+    # Adaptive concurrency limit + circuit breaker per upstream (vision, llm, tts)
+    UPSTREAM_LIMIT_INITIAL: int = 8
+    UPSTREAM_LIMIT_MIN: int = 1
+    UPSTREAM_LIMIT_MAX: int = 64
+    UPSTREAM_LIMIT_BACKOFF: float = 0.7  # multiplicative decrease on spikes, 429s, timeouts
+    UPSTREAM_LATENCY_SPIKE_FACTOR: float = 2.0
+    UPSTREAM_QUEUE_TIMEOUT_S: float = 2.0
+    UPSTREAM_BREAKER_FAILURES: int = 5  # consecutive failures before the circuit opens
+    UPSTREAM_BREAKER_RESET_S: float = 15.0
+
+    # Admission control: per-device token buckets + per-worker orchestration budget
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_IDENTIFY_RATE_PER_S: float = 1.0
+    ADMISSION_IDENTIFY_BURST: float = 5
+    ADMISSION_STREAM_RATE_PER_S: float = 0.2
+    ADMISSION_STREAM_BURST: float = 3
+    ADMISSION_MAX_STREAMS_PER_DEVICE: int = 2
+    ADMISSION_MAX_ORCHESTRATIONS: int = 32
+    ADMISSION_BUSY_RETRY_AFTER_S: float = 5.0
+    ADMISSION_MAX_TRACKED_DEVICES: int = 10000
+
+    # Attach the per-stream stage timeline to `eos` (debugging); it is always logged
+    GUIDE_TIMELINE_IN_EOS: bool = False
+
+    # Resumable guide sessions: output is kept this long after the socket drops
+    GUIDE_SESSION_GRACE_S: float = 60.0
+    GUIDE_SESSION_BUFFER_MAX_BYTES: int = 8 * 1024 * 1024  # per session; older audio then comes from replay
+    GUIDE_SESSION_MAX_SUBSCRIBERS: int = 50  # shared listening via `join`
+    GUIDE_SUBSCRIBER_SEND_TIMEOUT_S: float = 10.0  # a socket this slow is dropped, not waited for
+    # POST /guide/start returns a stream held in one worker's memory, so the WebSocket
+    # must reach that same process: one uvicorn worker per instance plus sticky routing.
+    # None = enabled only when WEB_CONCURRENCY <= 1 (the Dockerfile's --workers value).
+    GUIDE_START_ENABLED: Optional[bool] = None
+    WEB_CONCURRENCY: int = 1
+
+    # Continuous identify WebSocket
+    IDENTIFY_WS_MAX_FRAME_BYTES: int = 2 * 1024 * 1024
+    IDENTIFY_WS_UNCHANGED_DISTANCE: int = 4  # Hamming bits; closer frames are skipped
+    IDENTIFY_WS_UNCHANGED_MOVE_M: float = 25.0  # ...unless the device moved this far
+
+    # Maintenance Jobs (chunked cleanup of devices, identify sessions and audio objects)
+    MAINTENANCE_ENABLED: bool = True
+    MAINTENANCE_INTERVAL_MINUTES: int = 60
+    MAINTENANCE_BATCH_SIZE: int = 500
+    MAINTENANCE_BATCH_TIME_LIMIT_S: float = 2.0
+    MAINTENANCE_BATCH_PAUSE_S: float = 0.5
+    MAINTENANCE_RUN_BUDGET_S: float = 120.0
+    DEVICE_RETENTION_DAYS: int = 30
+    IDENTIFY_SESSION_RETENTION_DAYS: int = 7
+    AUDIO_RETENTION_HOURS: int = 72
+    AUDIO_ORPHAN_GRACE_MINUTES: int = 60
+
+    # Event-loop lag sampling (event_loop_lag_seconds on /metrics)
+    LOOP_LAG_SAMPLE_INTERVAL_S: float = 0.25
+
+    # Logging: LOG_ASYNC moves formatting and writes to a background thread;
+    # LOG_SAMPLE_RATES keeps a fraction of DEBUG/INFO per logger prefix, e.g. {"http": 0.1}
+    LOG_ASYNC: bool = True
+    LOG_FORMAT: str = "text"  # text | json
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never waited on
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
+    # Request completion lines (5xx and slow requests are always logged)
+    HTTP_LOG_SAMPLE_RATE: float = 1.0
+    HTTP_LOG_SLOW_S: float = 2.0
+    HTTP_LOG_SKIP_PATHS: List[str] = ["/metrics", "/api/v1/guide/health"]
+
+    # Shared cache: "memory" (per worker LRU) or "redis" (any Redis-protocol server, shared by workers/nodes)
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: Optional[str] = None  # redis[s]://[user:password@]host:6379/0
+    CACHE_KEY_PREFIX: str = "atg:"
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_MAX_ENTRIES: int = 50000
+    CACHE_REDIS_POOL_SIZE: int = 16
+    CACHE_REDIS_TIMEOUT_S: float = 0.5
+    CACHE_LOCK_TTL_S: float = 15.0  # stampede lock; longer than the slowest loader
+    CACHE_LOCK_WAIT_S: float = 12.0
+    CACHE_LOCK_POLL_S: float = 0.05
+    IDENTIFY_RESULT_TTL_S: int = 600  # exact-image identify answers
+    AUTH_CACHE_TTL_S: int = 30  # token -> profile; short so revocations apply quickly
+    AUDIO_CACHE_TTL_S: int = 3600  # segment bytes for replay
+
+    # Report ready before SDK imports / client construction finish (they warm up in a thread)
+    FAST_STARTUP: bool = False
+
     # Application Settings
     DEBUG: bool = True
     ENVIRONMENT: str = "development"
@@ -0,0 +1,97 @@
+# src/core/geo.py
+from math import cos, radians
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+# Mean meters per degree of latitude
+METERS_PER_DEG_LAT = 111_320.0
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 6) -> str:
+    """Encode coordinates into a geohash string of `precision` characters"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars: List[str] = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_bbox(geohash: str) -> Tuple[float, float, float, float]:
+    """Return (lat_lo, lat_hi, lng_lo, lng_hi) of a geohash cell"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for c in geohash:
+        value = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lat_hi, lng_lo, lng_hi
+
+
+def geohash_neighbors(geohash: str) -> List[str]:
+    """Return the cell itself followed by its (up to) 8 surrounding cells"""
+    lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(geohash)
+    dlat = lat_hi - lat_lo
+    dlng = lng_hi - lng_lo
+    clat = (lat_lo + lat_hi) / 2
+    clng = (lng_lo + lng_hi) / 2
+    cells = [geohash]
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dx == 0 and dy == 0:
+                continue
+            lat = clat + dy * dlat
+            if not -90.0 <= lat <= 90.0:
+                continue
+            lng = (clng + dx * dlng + 180.0) % 360.0 - 180.0
+            cell = geohash_encode(lat, lng, len(geohash))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Equirectangular distance in meters, accurate enough at city scale"""
+    x = (lng2 - lng1) * cos(radians((lat1 + lat2) / 2))
+    y = lat2 - lat1
+    return METERS_PER_DEG_LAT * (x * x + y * y) ** 0.5
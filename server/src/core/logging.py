@@ -1,6 +1,138 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
 from .config import settings
+from .metrics import registry
+
+# Request / guide / device IDs of the current task; copied into every record
+log_context: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "ctx", "color_message"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def bind_log_context(**ids: Optional[str]) -> contextvars.Token:
+    """Add IDs to the logging context of the current task; reset with the returned token"""
+    merged = dict(log_context.get())
+    merged.update({k: v for k, v in ids.items() if v})
+    return log_context.set(merged)
+
+
+def reset_log_context(token: contextvars.Token) -> None:
+    log_context.reset(token)
+
+
+def _extras(record: logging.LogRecord) -> Dict[str, object]:
+    fields = dict(getattr(record, "ctx", None) or {})
+    for key, value in record.__dict__.items():
+        if key not in _RECORD_ATTRS and not key.startswith("_"):
+            fields[key] = value
+    return fields
+
+
+class TextFormatter(logging.Formatter):
+    """The classic one-line format, followed by context IDs and `extra` fields"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _extras(record)
+        if not fields:
+            return line
+        pairs = " ".join(f"{k}={json.dumps(v, ensure_ascii=False, default=str)}" for k, v in fields.items())
+        head, sep, tail = line.partition("\n")  # keep tracebacks below the fields
+        return f"{head} {pairs}{sep}{tail}"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, context IDs and extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, object] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update(_extras(record))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of DEBUG/INFO records per logger prefix; WARNING and up always pass"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            prefix = max(
+                (p for p in self.rates if name == p or name.startswith(p + ".")),
+                key=len, default=None,
+            )
+            rate = self._resolved[name] = self.rates[prefix] if prefix is not None else 1.0
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the listener thread without formatting them on the caller.
+
+    Only the context IDs are captured here (they live in the caller's task);
+    message interpolation, JSON encoding, tracebacks and the write happen in
+    the listener. A full queue drops the record and counts it instead of
+    blocking the event loop.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        ctx = log_context.get()
+        if ctx:
+            record.ctx = ctx
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+class _ContextFilter(logging.Filter):
+    """Synchronous mode: attach the context IDs on the calling task"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = log_context.get()
+        if ctx:
+            record.ctx = ctx
+        return True
 
 
 def setup_logging(level: str | int | None = None) -> None:
@@ -10,7 +142,12 @@ def setup_logging(level: str | int | None = None) -> None:
     1) explicit level param
     2) env LOG_LEVEL
     3) settings.DEBUG -> DEBUG else INFO
+
+    With LOG_ASYNC (default) records go through a bounded queue to a listener
+    thread that formats and writes them, so a slow stdout never stalls the
+    event loop. LOG_FORMAT=json emits one JSON object per line.
     """
+    global _listener
     if getattr(setup_logging, "_configured", False):
         return
 
@@ -25,15 +162,31 @@ def setup_logging(level: str | int | None = None) -> None:
         else:
             resolved_level = logging.DEBUG if settings.DEBUG else logging.INFO
 
-    logging.basicConfig(
-        level=resolved_level,
-        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
-    )
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
 
-    # Make sure uvicorn loggers use our level
+    if settings.LOG_ASYNC:
+        handler: logging.Handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        _listener = logging.handlers.QueueListener(handler.queue, stream_handler)  # type: ignore[attr-defined]
+        _listener.start()
+        atexit.register(shutdown_logging)
+    else:
+        handler = stream_handler
+        handler.addFilter(_ContextFilter())
+    if settings.LOG_SAMPLE_RATES:
+        handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.setLevel(resolved_level)
+    root.addHandler(handler)
+
+    # Make sure uvicorn loggers use our level and, when async, our pipeline
     for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
         logger = logging.getLogger(name)
         logger.setLevel(resolved_level)
+        if settings.LOG_ASYNC:
+            logger.handlers.clear()
+            logger.propagate = True
 
     # Suppress noisy debug logs from SDKs even in DEBUG mode
     # Especially remove messages like "DEBUG [openai._base_client] Request options: ..."
@@ -50,3 +203,15 @@ def setup_logging(level: str | int | None = None) -> None:
     setup_logging._configured = True  # type: ignore[attr-defined]
 
 
+registry.callback(
+    "log_records_dropped_total", "Log records dropped because the logging queue was full",
+    lambda: NonBlockingQueueHandler.dropped, type="counter",
+)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,252 @@
+# src/core/metrics.py
+"""In-process metrics registry rendered in the Prometheus text exposition format.
+
+Hot-path operations are a dict lookup plus an integer/float update; label
+children are cached, so `metric.labels(...)` can be called per event. Values
+that already live in service stats objects are exported with callback metrics,
+which cost nothing until /metrics is scraped.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; spans sub-100ms cache hits up to the 30s upstream tail
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str, **kw: str):
+        key = tuple(values) if values else tuple(kw[n] for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: LabelValues, child) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(child.value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _render_child(self, key, child):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = 'le="%s"' % _fmt(bound)
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+        yield f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(child.sum)}"
+        yield f"{self.name}_count{_labels(self.labelnames, key)} {child.count}"
+
+
+class CallbackMetric(_Metric):
+    """Gauge or counter whose values are read from `fn` at scrape time.
+
+    fn returns either a number (no labels) or {label_values_tuple: number}.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        fn: Callable[[], Union[float, Dict[LabelValues, float]]],
+        labelnames: Sequence[str] = (),
+        type: str = "gauge",
+    ):
+        self.fn = fn
+        self.type = type
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._children = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        try:
+            values = self.fn()
+        except Exception:
+            return lines
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in values.items():
+            if value is None:
+                continue
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_fmt(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        # Re-registering (e.g. module reload) keeps the first instance
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Optional[Sequence[float]] = None
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets or DEFAULT_BUCKETS))  # type: ignore[return-value]
+
+    def callback(
+        self,
+        name: str,
+        help: str,
+        fn: Callable[[], Union[float, Dict[LabelValues, float]]],
+        labelnames: Sequence[str] = (),
+        type: str = "gauge",
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, fn, labelnames, type))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+registry = Registry()
+
+# Guide stream stages
+GUIDE_FIRST_TEXT_S = registry.histogram(
+    "guide_time_to_first_text_seconds", "Stream init to first text delta sent")
+GUIDE_FIRST_AUDIO_S = registry.histogram(
+    "guide_time_to_first_audio_seconds", "Stream init to first audio segment sent")
+GUIDE_LLM_S = registry.histogram(
+    "guide_llm_seconds", "Narration LLM call duration, first request to last token")
+GUIDE_TTS_S = registry.histogram(
+    "guide_tts_segment_seconds", "TTS synthesis time per sentence")
+GUIDE_UPLOAD_LAG_S = registry.histogram(
+    "guide_upload_lag_seconds", "Audio segment sent to storage upload finished")
+GUIDE_STREAMS = registry.counter(
+    "guide_streams_total", "Guide streams finished, by outcome", ("outcome",))
+
+# Identify
+VISION_REQUEST_S = registry.histogram(
+    "vision_request_seconds", "Single vision model request duration", ("detail",))
+IDENTIFY_S = registry.histogram(
+    "identify_seconds", "POST /guide/identify handling time, by answer source", ("source",))
+
+# Connections and upstreams
+WS_ACTIVE = registry.gauge(
+    "ws_active_sessions", "Open WebSocket sessions", ("channel",))
+UPSTREAM_ERRORS = registry.counter(
+    "upstream_errors_total", "Failed upstream AI calls", ("upstream", "kind"))
+
+# Requests
+HTTP_REQUEST_S = registry.histogram(
+    "http_request_seconds", "HTTP handling time until the response body is sent", ("method", "route", "status"))
+WS_SESSION_S = registry.histogram(
+    "ws_session_seconds", "WebSocket connection lifetime, accept to close", ("route",),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600))
+
+# Process
+EVENT_LOOP_LAG_S = registry.histogram(
+    "event_loop_lag_seconds", "Delay of a periodic wakeup past its scheduled time",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
@@ -0,0 +1,123 @@
+# src/core/middleware.py
+import logging
+import random
+import time
+import uuid
+from typing import Optional
+
+from .config import settings
+from .logging import bind_log_context, reset_log_context
+from .metrics import HTTP_REQUEST_S, WS_SESSION_S
+
+logger = logging.getLogger("http")
+
+
+def _route(scope) -> str:
+    # Route template, not the raw path, so histogram labels stay bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _request_id(scope) -> str:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-request-id" and value:
+            return value.decode("latin-1")[:64]
+    return uuid.uuid4().hex[:12]
+
+
+class RequestLoggingMiddleware:
+    """Pure ASGI middleware: request ID, latency histogram and one log line per request.
+
+    HTTP requests are timed until the response body is finished; WebSocket
+    connections from accept to close. The ID (incoming X-Request-ID or a new
+    one) is bound to the log context and echoed on HTTP responses. Completion
+    lines are sampled at HTTP_LOG_SAMPLE_RATE, except server errors and
+    requests slower than HTTP_LOG_SLOW_S.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _http(self, scope, receive, send):
+        request_id = _request_id(scope)
+        token = bind_log_context(requestId=request_id)
+        started = time.monotonic()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            logger.exception("%s %s failed", scope["method"], scope["path"])
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            route = _route(scope)
+            HTTP_REQUEST_S.labels(scope["method"], route, str(status)).observe(elapsed)
+            self._log(scope["method"], scope["path"], route, status, elapsed)
+            reset_log_context(token)
+
+    async def _websocket(self, scope, receive, send):
+        request_id = _request_id(scope)
+        token = bind_log_context(requestId=request_id)
+        accepted: Optional[float] = None
+        close_code: Optional[int] = None
+
+        async def send_wrapper(message):
+            nonlocal accepted, close_code
+            if message["type"] == "websocket.accept":
+                accepted = time.monotonic()
+            elif message["type"] == "websocket.close":
+                close_code = message.get("code", 1000)
+            await send(message)
+
+        async def receive_wrapper():
+            nonlocal close_code
+            message = await receive()
+            if message["type"] == "websocket.disconnect" and close_code is None:
+                close_code = message.get("code", 1005)
+            return message
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            route = _route(scope)
+            if accepted is not None:
+                lifetime = time.monotonic() - accepted
+                WS_SESSION_S.labels(route).observe(lifetime)
+                logger.info(
+                    "WS %s closed after %.1fs code=%s", scope["path"], lifetime, close_code,
+                    extra={"path": scope["path"], "durationMs": int(lifetime * 1000), "closeCode": close_code},
+                )
+            else:
+                logger.info("WS %s rejected before accept", scope["path"], extra={"path": scope["path"]})
+            reset_log_context(token)
+
+    @staticmethod
+    def _log(method: str, path: str, route: str, status: int, elapsed: float) -> None:
+        if path in settings.HTTP_LOG_SKIP_PATHS:
+            return
+        important = status >= 500 or elapsed >= settings.HTTP_LOG_SLOW_S
+        if not important and settings.HTTP_LOG_SAMPLE_RATE < 1.0 and random.random() >= settings.HTTP_LOG_SAMPLE_RATE:
+            return
+        # %-style args: interpolated by the log listener, not on the event loop
+        logger.log(
+            logging.WARNING if status >= 500 else logging.INFO,
+            "HTTP %s %s -> %d (%.0fms)", method, path, status, elapsed * 1000,
+            extra={"route": route, "status": status, "durationMs": round(elapsed * 1000, 1)},
+        )
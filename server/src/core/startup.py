@@ -0,0 +1,98 @@
+# src/core/startup.py
+"""Worker startup: deferred SDK warm-up and an import-time report.
+
+Heavy SDKs (any_llm/openai, supabase) are imported where they are first
+used, so importing src.main stays cheap. warm_up() pays those costs in one
+place. The lifespan runs it in a thread: with FAST_STARTUP the worker
+reports ready at once and warms up in the background, otherwise it waits.
+
+    python -m src.core.startup   # import-time report for src.main
+"""
+import asyncio
+import logging
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+from .metrics import registry
+
+logger = logging.getLogger("startup")
+
+# Seconds per phase: import (src.main), warmup
+phases: Dict[str, float] = {}
+
+
+def warm_up() -> float:
+    """Import the heavy SDKs and build the shared clients; returns seconds spent"""
+    started = time.perf_counter()
+    from .supabase import supabase_admin, supabase_anon
+    from ..services.orchestrator import tts_client
+    import any_llm  # noqa: F401  (first LLM call would import it otherwise)
+
+    supabase_admin.get()  # type: ignore[attr-defined]
+    supabase_anon.get()  # type: ignore[attr-defined]
+    tts_client()
+    elapsed = time.perf_counter() - started
+    phases["warmup"] = elapsed
+    return elapsed
+
+
+async def start_warm_up() -> Optional["asyncio.Task"]:
+    """Run warm_up off the event loop; in FAST_STARTUP mode don't wait for it"""
+    if settings.FAST_STARTUP:
+        task = asyncio.create_task(asyncio.to_thread(warm_up))
+        task.add_done_callback(_log_background_warm_up)
+        return task
+    await asyncio.to_thread(warm_up)
+    return None
+
+
+def _log_background_warm_up(task: "asyncio.Task") -> None:
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error("background warm-up failed", exc_info=task.exception())
+    else:
+        logger.info("background warm-up done", extra={"warmupS": round(task.result(), 3)})
+
+
+registry.callback(
+    "startup_seconds", "Worker startup time by phase",
+    lambda: {(k,): v for k, v in phases.items()},
+    ("phase",),
+)
+
+
+def import_report(module: str = "src.main", top: int = 25) -> Tuple[float, List[Tuple[float, str]]]:
+    """Run `python -X importtime -c 'import module'` and return (total_s, [(cumulative_s, name)])"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    rows: List[Tuple[float, str]] = []
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            seconds = int(cumulative) / 1e6
+        except ValueError:
+            continue  # header line
+        rows.append((seconds, name.rstrip()))
+        if name.strip() == module:
+            total = seconds
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    rows.sort(reverse=True)
+    return total, rows[:top]
+
+
+if __name__ == "__main__":
+    total, rows = import_report()
+    print(f"import src.main: {total:.3f}s (cumulative, top modules)")
+    for seconds, name in rows:
+        print(f"{seconds:8.3f}s  {name}")
+    print(f"warm_up(): {warm_up():.3f}s")
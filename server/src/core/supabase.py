@@ -1,20 +1,57 @@
 # src/core/supabase.py
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING, Callable, Optional
+
 from .config import settings
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+class LazyClient:
+    """A Supabase client built on first use (or by warm_up in the lifespan).
+
+    Building a client costs a few hundred ms and pulls in the auth, storage
+    and functions SDKs, so import time only creates this placeholder.
+    Attribute access is forwarded to the real client.
+    """
+
+    def __init__(self, factory: Callable[[], "Client"]):
+        self._factory = factory
+        self._client: Optional["Client"] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> "Client":
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+def _create(key: str) -> "Client":
+    from supabase import create_client
+    return create_client(settings.SUPABASE_URL, key)
+
+
 # Service Role Client (用于后端管理操作)
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+supabase_admin: "Client" = LazyClient(lambda: _create(settings.SUPABASE_SERVICE_KEY))  # type: ignore[assignment]
 
 # Anon Key Client (用于模拟用户操作或公共数据访问)
-supabase_anon: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+supabase_anon: "Client" = LazyClient(lambda: _create(settings.SUPABASE_ANON_KEY))  # type: ignore[assignment]
 
 # Per-request client factory to avoid mutating the global anon client
-def make_user_client(access_token: str | None = None, refresh_token: str | None = None) -> Client:
+def make_user_client(access_token: str | None = None, refresh_token: str | None = None) -> "Client":
     """
     Create a per-request Supabase client and optionally inject a user session.
     This avoids polluting the global supabase_anon client state.
     """
-    client: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+    client: "Client" = _create(settings.SUPABASE_ANON_KEY)
     if access_token:
         client.auth.set_session(access_token, refresh_token)
-    return client
\ No newline at end of file
+    return client
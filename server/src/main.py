@@ -1,24 +1,51 @@
 # src/main.py
-from fastapi import FastAPI, Request
-from .api.v1 import users, auth, devices, guide
+import time
+_import_started = time.perf_counter()
+
 import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from .api.v1 import users, auth, devices, guide
 from .core.logging import setup_logging
+from .core.middleware import RequestLoggingMiddleware
+from .services.maintenance import maintenance_service
+from .services.landmark_index import landmark_index
+from .services.loop_monitor import loop_monitor
+from .core.metrics import registry
+from .core.startup import phases, start_warm_up
+from .services.cache import cache
 
 setup_logging()
-app = FastAPI(title="AI Tour Guide Backend")
 
-# Basic request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger = logging.getLogger("http")
-    logger.info(f"HTTP {request.method} {request.url.path}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # SDK imports and client construction, off the loop (in the background with FAST_STARTUP)
+    await start_warm_up()
+    logging.getLogger("startup").info("worker ready", extra={
+        "importS": round(phases.get("import", 0.0), 3),
+        "warmupS": round(phases["warmup"], 3) if "warmup" in phases else None,
+    })
+    # Background cleanup of devices, identify sessions and stale audio objects
+    maintenance_service.start()
+    # Spatial prior of past identifications, refreshed incrementally
+    landmark_index.start()
+    # Event-loop lag, the first sign of blocking work on the loop
+    loop_monitor.start()
     try:
-        response = await call_next(request)
-        logger.info(f"HTTP {request.method} {request.url.path} -> {response.status_code}")
-        return response
-    except Exception as e:
-        logger.exception(f"Unhandled error for {request.method} {request.url.path}: {e}")
-        raise
+        yield
+    finally:
+        await loop_monitor.stop()
+        await cache.close()
+        await landmark_index.stop()
+        maintenance_service.shutdown()
+
+
+app = FastAPI(title="AI Tour Guide Backend", lifespan=lifespan)
+
+# Request IDs, latency histograms and one log line per HTTP request / WebSocket session
+app.add_middleware(RequestLoggingMiddleware)
 
 # Include routers
 # Auth endpoints available at both /auth and /api/v1/auth for backward compatibility
@@ -30,6 +57,15 @@ app.include_router(devices.router, prefix="/api/v1/devices", tags=["devices"])
 # Guide endpoints for the "拍照即听" feature
 app.include_router(guide.router, prefix="/api/v1", tags=["guide"])
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of the in-process metrics registry"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to AI Tour Guide Backend"}
\ No newline at end of file
+    return {"message": "Welcome to AI Tour Guide Backend"}
+
+
+# Everything above ran at import; reported by the lifespan and on /metrics
+phases["import"] = time.perf_counter() - _import_started
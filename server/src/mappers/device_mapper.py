@@ -1,7 +1,7 @@
 # src/mappers/device_mapper.py
 import uuid
 from datetime import datetime, timedelta
-from typing import Optional, List, TYPE_CHECKING
+from typing import Optional, List, Iterator, Iterable, TYPE_CHECKING
 from postgrest import APIResponse
 
 if TYPE_CHECKING:
@@ -9,6 +9,16 @@ if TYPE_CHECKING:
 
 from ..models.db_models import Device
 
+# PostgREST encodes `in.(...)` filters into the query string, so very large
+# token lists are split to keep each request URL within proxy limits.
+BULK_CHUNK_SIZE = 200
+
+
+def _chunks(items: List[str], size: int = BULK_CHUNK_SIZE) -> Iterator[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
 class DeviceMapper:
     def __init__(self, db: "Client"):
         self.db = db
@@ -21,53 +31,25 @@ class DeviceMapper:
     ) -> Device:
         """
         Create or update a device record for push notifications.
-        Uses upsert logic based on push_token.
+        Single round trip: upserts on the unique push_token column.
         """
         try:
-            # First try to update existing device
-            existing_response: APIResponse = (
+            device_data = {
+                "user_id": str(user_id),
+                "push_token": push_token,
+                "platform": platform,
+                "disabled": False,
+                "created_at": datetime.utcnow().isoformat()
+            }
+            
+            response: APIResponse = (
                 self.db.table("devices")
-                .select("*")
-                .eq("push_token", push_token)
+                .upsert(device_data, on_conflict="push_token")
                 .execute()
             )
             
-            if existing_response.data:
-                # Update existing device
-                update_data = {
-                    "user_id": str(user_id),
-                    "platform": platform,
-                    "disabled": False,
-                    "created_at": datetime.utcnow().isoformat()
-                }
-                
-                response: APIResponse = (
-                    self.db.table("devices")
-                    .update(update_data)
-                    .eq("push_token", push_token)
-                    .execute()
-                )
-                
-                if response.data:
-                    return Device(**response.data[0])
-            else:
-                # Create new device
-                insert_data = {
-                    "user_id": str(user_id),
-                    "push_token": push_token,
-                    "platform": platform,
-                    "disabled": False,
-                    "created_at": datetime.utcnow().isoformat()
-                }
-                
-                response: APIResponse = (
-                    self.db.table("devices")
-                    .insert(insert_data)
-                    .execute()
-                )
-                
-                if response.data:
-                    return Device(**response.data[0])
+            if response.data:
+                return Device(**response.data[0])
             
             raise Exception("Failed to create or update device")
             
@@ -168,18 +150,91 @@ class DeviceMapper:
             print(f"Error enabling device: {e}")
             return False
     
-    async def cleanup_old_devices(self, days: int = 30) -> int:
+    async def disable_devices(self, push_tokens: Iterable[str]) -> int:
+        """
+        Disable many devices at once (e.g. from push delivery receipts).
+        Returns the number of rows updated.
+        """
+        return await self._bulk_set_disabled(push_tokens, True)
+    
+    async def enable_devices(self, push_tokens: Iterable[str]) -> int:
+        """
+        Re-enable many devices at once.
+        Returns the number of rows updated.
+        """
+        return await self._bulk_set_disabled(push_tokens, False)
+    
+    async def delete_devices(self, push_tokens: Iterable[str]) -> int:
         """
-        Clean up devices that haven't been used for a specified number of days.
+        Delete many devices by push token regardless of owner.
+        Returns the number of deleted rows.
+        """
+        tokens = list(dict.fromkeys(t for t in push_tokens if t))
+        if not tokens:
+            return 0
+        try:
+            deleted = 0
+            for chunk in _chunks(tokens):
+                response: APIResponse = (
+                    self.db.table("devices")
+                    .delete()
+                    .in_("push_token", chunk)
+                    .execute()
+                )
+                deleted += len(response.data) if response.data else 0
+            return deleted
+            
+        except Exception as e:
+            print(f"Error deleting devices: {e}")
+            return 0
+    
+    async def _bulk_set_disabled(self, push_tokens: Iterable[str], disabled: bool) -> int:
+        tokens = list(dict.fromkeys(t for t in push_tokens if t))
+        if not tokens:
+            return 0
+        try:
+            updated = 0
+            for chunk in _chunks(tokens):
+                response: APIResponse = (
+                    self.db.table("devices")
+                    .update({"disabled": disabled})
+                    .in_("push_token", chunk)
+                    .execute()
+                )
+                updated += len(response.data) if response.data else 0
+            return updated
+            
+        except Exception as e:
+            print(f"Error updating devices (disabled={disabled}): {e}")
+            return 0
+    
+    async def cleanup_old_devices(self, days: int = 30, batch_size: int = BULK_CHUNK_SIZE) -> int:
+        """
+        Delete one bounded batch of devices that haven't registered for `days` days.
+        Oldest rows go first; callers loop until fewer than `batch_size` are returned.
         Returns the number of deleted devices.
         """
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
+            # Pick the batch through the created_at index, then delete by primary key
+            # so a single statement never touches an unbounded range.
+            candidates: APIResponse = (
+                self.db.table("devices")
+                .select("id")
+                .lt("created_at", cutoff_date.isoformat())
+                .order("created_at")
+                .limit(batch_size)
+                .execute()
+            )
+            ids = [row["id"] for row in (candidates.data or [])]
+            if not ids:
+                return 0
+            
             response: APIResponse = (
                 self.db.table("devices")
                 .delete()
-                .lt("created_at", cutoff_date.isoformat())
+                .in_("id", ids)
                 .execute()
             )
             
@@ -187,4 +242,4 @@ class DeviceMapper:
             
         except Exception as e:
             print(f"Error cleaning up old devices: {e}")
-            return 0
\ No newline at end of file
+            return 0
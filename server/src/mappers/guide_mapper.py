@@ -1,7 +1,7 @@
 # src/mappers/guide_mapper.py
 import uuid
-from datetime import datetime
-from typing import Optional, List, Dict, Any, TYPE_CHECKING
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple, TYPE_CHECKING
 from postgrest import APIResponse
 from ..models.guide_models import IdentifySession, Guide, GuideSegment
 from ..schemas.guide import AudioSegmentInfo
@@ -10,6 +10,9 @@ import logging
 if TYPE_CHECKING:
     from supabase import Client
 
+# Columns the history list shows; transcripts are fetched per guide
+GUIDE_LIST_COLUMNS = "guide_id,spot,title,confidence,duration_ms,audio_expired,created_at"
+
 class GuideMapper:
     """Data mapper for guide-related database operations"""
     
@@ -26,7 +29,8 @@ class GuideMapper:
         accuracy_m: Optional[int] = None,
         spot: Optional[str] = None,
         confidence: Optional[float] = None,
-        bbox: Optional[Dict[str, Any]] = None
+        bbox: Optional[Dict[str, Any]] = None,
+        source: Optional[str] = None
     ) -> Optional[IdentifySession]:
         """
         Create a new identify session record
@@ -40,6 +44,7 @@ class GuideMapper:
             spot: Identified location name
             confidence: Confidence score
             bbox: Bounding box coordinates
+            source: Where the answer came from (vision, cache or prior)
             
         Returns:
             Created IdentifySession or None if failed
@@ -64,6 +69,8 @@ class GuideMapper:
                 session_data["confidence"] = confidence
             if bbox is not None:
                 session_data["bbox"] = bbox
+            if source is not None:
+                session_data["source"] = source
             
             response: APIResponse = (
                 self.db.table("identify_sessions")
@@ -106,6 +113,85 @@ class GuideMapper:
             print(f"Error getting identify session: {e}")
             return None
     
+    async def update_identify_session(
+        self,
+        identify_id: str,
+        spot: Optional[str] = None,
+        confidence: Optional[float] = None,
+        bbox: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> bool:
+        """
+        Update the answer stored on an identify session
+        
+        Args:
+            identify_id: Session identifier
+            spot: Identified location name
+            confidence: Confidence score
+            bbox: Bounding box coordinates
+            **kwargs: Other fields to update
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            update_data: Dict[str, Any] = {"spot": spot, "confidence": confidence, "bbox": bbox}
+            update_data.update(kwargs)
+            
+            response: APIResponse = (
+                self.db.table("identify_sessions")
+                .update(update_data)
+                .eq("identify_id", identify_id)
+                .execute()
+            )
+            if not response.data:
+                # No row matched; the session was never stored or already expired
+                self.logger.warning("identify session not found for update", extra={"identifyId": identify_id})
+                return False
+            self.logger.info("identify session updated", extra={"identifyId": identify_id})
+            return True
+            
+        except Exception as e:
+            print(f"Error updating identify session: {e}")
+            return False
+    
+    async def get_identify_sessions_since(
+        self,
+        since: datetime,
+        min_confidence: float = 0.0,
+        limit: int = 1000
+    ) -> List[IdentifySession]:
+        """
+        Get located identify sessions created at or after `since`, oldest first
+        
+        Args:
+            since: Lower bound on created_at (inclusive)
+            min_confidence: Minimum confidence of the stored best candidate
+            limit: Maximum number of rows to return
+            
+        Returns:
+            List of IdentifySession objects (projected to the columns the landmark index needs)
+        """
+        try:
+            response: APIResponse = (
+                self.db.table("identify_sessions")
+                .select("identify_id,device_id,lat,lng,accuracy_m,spot,confidence,source,created_at")
+                .gte("created_at", since.isoformat())
+                .gte("confidence", min_confidence)
+                .not_.is_("lat", "null")
+                .order("created_at")
+                .limit(limit)
+                .execute()
+            )
+            
+            if response.data:
+                return [IdentifySession(**row) for row in response.data]
+            return []
+            
+        except Exception as e:
+            print(f"Error getting identify sessions: {e}")
+            return []
+    
     async def create_guide(
         self,
         guide_id: str,
@@ -420,31 +506,146 @@ class GuideMapper:
             print(f"Error creating guide and segments: {e}")
             return False
     
-    async def get_guides_by_device(self, device_id: str, limit: int = 50) -> List[Guide]:
+    async def get_guides_by_device(
+        self,
+        device_id: str,
+        limit: int = 50,
+        before: Optional[Tuple[str, str]] = None
+    ) -> List[Guide]:
         """
-        Get guides for a specific device
+        Get one page of a device's guides, newest first
         
         Args:
             device_id: Device identifier
             limit: Maximum number of guides to return
+            before: (created_at, guide_id) of the last row of the previous page
+            
+        Returns:
+            List of Guide objects (list columns only; no transcript)
+            
+        Keyset pagination on (created_at, guide_id), served by
+        idx_guides_device_created_guide. Raises on failure so an error is
+        never cached as an empty history.
+        """
+        query = (
+            self.db.table("guides")
+            .select(GUIDE_LIST_COLUMNS)
+            .eq("device_id", device_id)
+        )
+        if before is not None:
+            created_at, guide_id = before
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",guide_id.lt."{guide_id}")'
+            )
+        response: APIResponse = (
+            query
+            .order("created_at", desc=True)
+            .order("guide_id", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return [Guide(**guide_data) for guide_data in (response.data or [])]
+    
+    async def cleanup_old_identify_sessions(self, days: int = 7, batch_size: int = 500) -> int:
+        """
+        Delete one bounded batch of identify sessions older than `days` days
+        
+        Args:
+            days: Retention in days
+            batch_size: Maximum number of rows deleted by this call
             
         Returns:
-            List of Guide objects
+            Number of deleted sessions
         """
         try:
+            cutoff = datetime.utcnow() - timedelta(days=days)
+            candidates: APIResponse = (
+                self.db.table("identify_sessions")
+                .select("identify_id")
+                .lt("created_at", cutoff.isoformat())
+                .order("created_at")
+                .limit(batch_size)
+                .execute()
+            )
+            ids = [row["identify_id"] for row in (candidates.data or [])]
+            if not ids:
+                return 0
+            
             response: APIResponse = (
-                self.db.table("guides")
-                .select("*")
-                .eq("device_id", device_id)
-                .order("created_at", desc=True)
-                .limit(limit)
+                self.db.table("identify_sessions")
+                .delete()
+                .in_("identify_id", ids)
                 .execute()
             )
+            return len(response.data) if response.data else 0
             
-            if response.data:
-                return [Guide(**guide_data) for guide_data in response.data]
-            return []
+        except Exception as e:
+            print(f"Error cleaning up identify sessions: {e}")
+            return 0
+    
+    async def get_existing_guide_ids(self, guide_ids: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of guide_ids that have a row in the guides table
+        
+        Args:
+            guide_ids: Candidate guide identifiers
+            
+        Returns:
+            Set of guide identifiers that exist
+            
+        Raises on failure so callers never mistake an error for "no rows".
+        """
+        ids = list(dict.fromkeys(guide_ids))
+        if not ids:
+            return set()
+        response: APIResponse = (
+            self.db.table("guides")
+            .select("guide_id")
+            .in_("guide_id", ids)
+            .execute()
+        )
+        return {row["guide_id"] for row in (response.data or [])}
+    
+    async def mark_guide_audio_expired(self, guide_id: str) -> bool:
+        """
+        Flag a guide whose audio objects and segments were removed; the row is kept
+        
+        Args:
+            guide_id: Guide identifier
+            
+        Returns:
+            True if a row was updated
+            
+        Raises on failure so the caller does not report a half-expired guide as done.
+        """
+        response: APIResponse = (
+            self.db.table("guides")
+            .update({"audio_expired": True})
+            .eq("guide_id", guide_id)
+            .execute()
+        )
+        return bool(response.data)
+    
+    async def delete_guide_segments(self, guide_id: str) -> int:
+        """
+        Delete segment rows of a guide (after its audio objects were removed)
+        
+        Args:
+            guide_id: Guide identifier
+            
+        Returns:
+            Number of deleted segment rows
+        """
+        try:
+            response: APIResponse = (
+                self.db.table("guide_segments")
+                .delete()
+                .eq("guide_id", guide_id)
+                .execute()
+            )
+            return len(response.data) if response.data else 0
             
         except Exception as e:
-            print(f"Error getting guides by device: {e}")
-            return []
+            print(f"Error deleting guide segments: {e}")
+            return 0
@@ -13,6 +13,7 @@ class IdentifySession(BaseModel):
     spot: Optional[str] = None
     confidence: Optional[float] = None
     bbox: Optional[Dict[str, Any]] = None
+    source: Optional[str] = None  # vision | cache | prior
     created_at: datetime
 
     class Config:
@@ -27,6 +28,7 @@ class Guide(BaseModel):
     confidence: Optional[float] = None
     transcript: Optional[str] = None
     duration_ms: Optional[int] = None
+    audio_expired: bool = False
     created_at: datetime
 
     class Config:
@@ -50,12 +50,49 @@ class InitMessage(BaseModel):
             raise ValueError("Either imageBase64 or imageUrl must be provided")
         return self
 
+# 1.2b REST API: /guide/start (generation starts before the WebSocket connects)
+class GuideStartRequest(BaseModel):
+    """Same payload as `init`, sent over HTTP"""
+    deviceId: str = Field(..., description="Device identifier")
+    imageBase64: Optional[str] = Field(None, description="Base64 string or data URL")
+    imageUrl: Optional[str] = Field(None, description="Direct https URL to the image")
+    identifyId: Optional[str] = Field(None, description="Optional identify session ID")
+    geo: Geo = Field(..., description="Geographic location")
+    prefs: Dict[str, Any] = Field(default_factory=dict, description="User preferences")
+
+    @model_validator(mode="after")
+    def _validate_image_source(self) -> "GuideStartRequest":
+        if not self.imageBase64 and not self.imageUrl:
+            raise ValueError("Either imageBase64 or imageUrl must be provided")
+        return self
+
+    def to_init(self) -> InitMessage:
+        return InitMessage(type="init", **self.model_dump())
+
+class GuideStartResponse(BaseModel):
+    """Where to pick up a guide that is already being generated"""
+    streamId: str = Field(..., description="Stream identifier (the guideId)")
+    websocketUrl: str = Field(..., description="Path of the WebSocket to subscribe on")
+
 class ReplayMessage(BaseModel):
     """Request to replay from specific position"""
     type: Literal["replay"]
     guideId: str = Field(..., description="Guide identifier")
     fromMs: int = Field(..., description="Start position in milliseconds")
 
+class ResumeMessage(BaseModel):
+    """Reattach to a guide still held by the server after a reconnect"""
+    type: Literal["resume"]
+    guideId: str = Field(..., description="Guide identifier from meta")
+    lastSeq: int = Field(-1, description="Last audio segment seq received (-1 for none)")
+    textOffset: int = Field(0, description="Transcript characters already received")
+
+class JoinMessage(BaseModel):
+    """Listen to a guide another device is generating (shared listening)"""
+    type: Literal["join"]
+    guideId: str = Field(..., description="Guide identifier shared by the originator")
+    deviceId: Optional[str] = Field(None, description="Listener device identifier")
+
 class NackMessage(BaseModel):
     """Negative acknowledgment for audio segment"""
     type: Literal["nack"]
@@ -71,7 +108,7 @@ class PingMessage(BaseModel):
     ts: Optional[int] = Field(None, description="Client timestamp (ms)")
 
 # Union type for all client messages
-ClientMessage = Union[InitMessage, ReplayMessage, NackMessage, CloseMessage, PingMessage]
+ClientMessage = Union[InitMessage, ReplayMessage, ResumeMessage, JoinMessage, NackMessage, CloseMessage, PingMessage]
 
 # 1.3 WebSocket Messages - Server to Client
 class MetaMessage(BaseModel):
@@ -94,6 +131,7 @@ class EosMessage(BaseModel):
     guideId: str = Field(..., description="Guide identifier")
     totalDurationMs: int = Field(..., description="Total duration in milliseconds")
     transcript: str = Field(..., description="Complete transcript")
+    timeline: Optional[Dict[str, Any]] = Field(None, description="Stage timeline (debug only)")
 
 class ErrorMessage(BaseModel):
     """Error notification"""
@@ -102,15 +140,57 @@ class ErrorMessage(BaseModel):
     message: str = Field(..., description="Error message")
     details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
 
+class ResumedMessage(BaseModel):
+    """Resume accepted; the missing frames follow"""
+    type: Literal["resumed"]
+    guideId: str = Field(..., description="Guide identifier")
+    done: bool = Field(..., description="Generation already finished")
+
 # Server pong response
 class PongMessage(BaseModel):
     type: Literal["pong"]
     ts: int = Field(..., description="Server timestamp (ms)")
 
 # Union type for all server messages
-ServerMessage = Union[MetaMessage, TextMessage, EosMessage, ErrorMessage, PongMessage]
+ServerMessage = Union[MetaMessage, TextMessage, EosMessage, ErrorMessage, ResumedMessage, PongMessage]
 
-# 1.4 Additional helper schemas
+# 1.4 WebSocket continuous identify (/guide/identify/ws)
+# Client sends an IdentifyStartMessage, then JPEG frames as binary messages.
+class IdentifyStartMessage(BaseModel):
+    """Open a continuous identify channel"""
+    type: Literal["start"]
+    deviceId: str = Field(..., description="Device identifier")
+    geo: Geo = Field(..., description="Geographic location")
+
+class GeoUpdateMessage(BaseModel):
+    """Position update applied to subsequent frames"""
+    type: Literal["geo"]
+    geo: Geo = Field(..., description="Geographic location")
+
+class CandidatesMessage(BaseModel):
+    """Candidates pushed whenever the identification changes"""
+    type: Literal["candidates"]
+    identifyId: str = Field(..., description="Identify session ID usable in init")
+    candidates: List[Candidate] = Field(..., description="List of location candidates")
+    source: str = Field(..., description="vision | cache | prior | timeout | degraded")
+
+# 1.4b REST history: /guide/guides/{device_id}
+class GuideSummary(BaseModel):
+    """One row of the guide history list"""
+    guideId: str
+    spot: Optional[str] = None
+    title: Optional[str] = None
+    confidence: Optional[float] = None
+    durationMs: Optional[int] = None
+    audioExpired: bool = False
+    createdAt: Optional[str] = None
+
+class GuideListResponse(BaseModel):
+    """A page of guides, newest first"""
+    guides: List[GuideSummary] = Field(..., description="Guides on this page")
+    nextCursor: Optional[str] = Field(None, description="Pass as `cursor` for the next page; null on the last page")
+
+# 1.5 Additional helper schemas
 class UserPreferences(BaseModel):
     """User preferences for guide generation"""
     language: str = Field(default="zh-CN", description="Preferred language")
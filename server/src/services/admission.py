@@ -0,0 +1,145 @@
+# src/services/admission.py
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator
+import logging
+
+from ..core.config import settings
+from ..core.metrics import registry
+
+
+class AdmissionRejected(Exception):
+    """Request shed before any work was done; retry_after_s is a client hint"""
+
+    def __init__(self, reason: str, retry_after_s: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+    @property
+    def retry_after_ms(self) -> int:
+        return int(self.retry_after_s * 1000)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take one token; returns 0 on success, else seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+@dataclass
+class AdmissionStats:
+    identify_admitted: int = 0
+    identify_shed_rate: int = 0
+    stream_admitted: int = 0
+    stream_shed_rate: int = 0
+    stream_shed_device: int = 0
+    stream_shed_global: int = 0
+
+
+class AdmissionController:
+    """Per-device token buckets and a per-worker budget of concurrent orchestrations.
+
+    Checks are pure in-memory bookkeeping so a rejection costs less than parsing
+    the image it carries. Buckets are kept per (kind, deviceId) and LRU-bounded
+    at ADMISSION_MAX_TRACKED_DEVICES.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("service.admission")
+        self.buckets: "OrderedDict[tuple[str, str], TokenBucket]" = OrderedDict()
+        self.active_streams: Dict[str, int] = defaultdict(int)
+        self.active_total = 0
+        self.stats = AdmissionStats()
+
+    def _bucket(self, kind: str, device_id: str, rate: float, burst: float) -> TokenBucket:
+        key = (kind, device_id)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(rate, burst)
+            while len(self.buckets) > settings.ADMISSION_MAX_TRACKED_DEVICES:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def admit_identify(self, device_id: str) -> None:
+        """Raise AdmissionRejected if this device is over its identify rate"""
+        if not settings.ADMISSION_ENABLED:
+            return
+        wait = self._bucket(
+            "identify", device_id,
+            settings.ADMISSION_IDENTIFY_RATE_PER_S, settings.ADMISSION_IDENTIFY_BURST,
+        ).take()
+        if wait > 0:
+            self.stats.identify_shed_rate += 1
+            raise AdmissionRejected("identify rate limit", wait)
+        self.stats.identify_admitted += 1
+
+    @contextmanager
+    def orchestration(self, device_id: str) -> Iterator[None]:
+        """Hold a stream slot for the duration of one orchestration"""
+        if not settings.ADMISSION_ENABLED:
+            yield
+            return
+        if self.active_total >= settings.ADMISSION_MAX_ORCHESTRATIONS:
+            self.stats.stream_shed_global += 1
+            raise AdmissionRejected("server busy", settings.ADMISSION_BUSY_RETRY_AFTER_S)
+        if self.active_streams.get(device_id, 0) >= settings.ADMISSION_MAX_STREAMS_PER_DEVICE:
+            self.stats.stream_shed_device += 1
+            raise AdmissionRejected("too many concurrent streams for device", settings.ADMISSION_BUSY_RETRY_AFTER_S)
+        wait = self._bucket(
+            "stream", device_id,
+            settings.ADMISSION_STREAM_RATE_PER_S, settings.ADMISSION_STREAM_BURST,
+        ).take()
+        if wait > 0:
+            self.stats.stream_shed_rate += 1
+            raise AdmissionRejected("stream rate limit", wait)
+
+        self.stats.stream_admitted += 1
+        self.active_total += 1
+        self.active_streams[device_id] += 1
+        try:
+            yield
+        finally:
+            self.active_total -= 1
+            self.active_streams[device_id] -= 1
+            if self.active_streams[device_id] <= 0:
+                del self.active_streams[device_id]
+
+    def get_stats(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "active_orchestrations": self.active_total,
+            "tracked_buckets": len(self.buckets),
+        }
+
+
+# Global instance (per worker)
+admission = AdmissionController()
+
+registry.callback(
+    "admission_events_total", "Admitted and shed identify / stream requests",
+    lambda: {(k,): v for k, v in asdict(admission.stats).items()},
+    ("event",), type="counter",
+)
+registry.callback(
+    "active_orchestrations", "Guide orchestrations running on this worker",
+    lambda: admission.active_total,
+)
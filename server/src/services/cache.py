@@ -0,0 +1,390 @@
+# src/services/cache.py
+import asyncio
+import json
+import ssl
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+import logging
+
+from ..core.config import settings
+from ..core.metrics import registry
+from .singleflight import SingleFlight
+from .upstream_guard import CircuitBreaker
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    expired: int = 0
+    errors: int = 0
+    loads: int = 0
+    lock_waits: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+
+class CacheBackend:
+    """Byte-valued key/value store with TTLs; all methods are coroutines.
+
+    `add` is set-if-absent and is what the stampede lock is built on.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def add(self, key: str, value: bytes, ttl_s: float) -> bool:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def size_bytes(self) -> Optional[int]:
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU bounded by total bytes (keys + values) and entry count"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()  # key -> (expires_at, value)
+        self.bytes = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at and expires_at <= time.monotonic():
+            self._remove(key)
+            self.stats.expired += 1
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return  # would evict everything else
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (time.monotonic() + ttl_s if ttl_s else 0.0, value)
+        self.bytes += size
+        while self.bytes > self.max_bytes or len(self.entries) > self.max_entries:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    async def add(self, key: str, value: bytes, ttl_s: float) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl_s)
+        return True
+
+    async def delete(self, key: str) -> None:
+        if key in self.entries:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, value = self.entries.pop(key)
+        self.bytes -= len(key) + len(value)
+
+    def size_bytes(self) -> Optional[int]:
+        return self.bytes
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP2 client (GET / SET PX NX / DEL) over a small connection pool.
+
+    Works with anything that speaks the Redis protocol (Redis, Valkey, KeyDB,
+    Dragonfly). URL: redis[s]://[user:password@]host:port/db. A connection
+    that fails or is interrupted mid-command is discarded, never reused.
+    Repeated connection failures open a circuit breaker so an unreachable
+    server costs nothing per request until the probe succeeds.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, pool_size: int, timeout_s: float, key_prefix: str = ""):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.ssl = ssl.create_default_context() if parsed.scheme == "rediss" else None
+        self.timeout_s = timeout_s
+        self.key_prefix = key_prefix
+        self.pool_size = pool_size
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+        self.breaker = CircuitBreaker("cache")
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        if self.password:
+            auth = ["AUTH", self.username, self.password] if self.username else ["AUTH", self.password]
+            await self._roundtrip(reader, writer, auth)
+        if self.db:
+            await self._roundtrip(reader, writer, ["SELECT", str(self.db)])
+        return reader, writer
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await asyncio.wait_for(self._connect(), self.timeout_s)
+            try:
+                yield conn
+            except BaseException:
+                conn[1].close()
+                raise
+            self._idle.append(conn)
+
+    @staticmethod
+    def _encode(args: List[Any]) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    async def _read(self, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            return (await reader.readexactly(size + 2))[:-2]
+        if kind == b"*":
+            count = int(rest)
+            return None if count < 0 else [await self._read(reader) for _ in range(count)]
+        raise RedisError(f"unexpected reply {line!r}")
+
+    async def _roundtrip(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, args: List[Any]) -> Any:
+        writer.write(self._encode(args))
+        await writer.drain()
+        return await self._read(reader)
+
+    async def execute(self, *args: Any) -> Any:
+        self.breaker.check()
+        try:
+            async with self._connection() as (reader, writer):
+                reply = await asyncio.wait_for(self._roundtrip(reader, writer, list(args)), self.timeout_s)
+        except (OSError, asyncio.TimeoutError):
+            self.breaker.on_failure()
+            raise
+        except BaseException:
+            self.breaker.on_cancel()
+            raise
+        self.breaker.on_success()
+        return reply
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", self.key_prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        args: List[Any] = ["SET", self.key_prefix + key, value]
+        if ttl_s:
+            args += ["PX", max(1, int(ttl_s * 1000))]
+        await self.execute(*args)
+
+    async def add(self, key: str, value: bytes, ttl_s: float) -> bool:
+        reply = await self.execute("SET", self.key_prefix + key, value, "NX", "PX", max(1, int(ttl_s * 1000)))
+        return reply == "OK"
+
+    async def delete(self, key: str) -> None:
+        await self.execute("DEL", self.key_prefix + key)
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+class Cache:
+    """Namespaced cache over one backend shared by the guide, vision and auth paths.
+
+    Backend errors are logged and read as misses, so an unreachable Redis
+    slows requests down but never fails them. get_or_load collapses
+    concurrent misses for a key: in-process through SingleFlight, and across
+    workers through a short `lock:` key taken with set-if-absent. Losers poll
+    for the value and load it themselves if the lock holder does not finish
+    within CACHE_LOCK_WAIT_S.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.logger = logging.getLogger("service.cache")
+        self.backend = backend
+        self.inflight = SingleFlight("cache")
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.backend.stats
+
+    async def get_bytes(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            value = await self.backend.get(f"{namespace}:{key}")
+        except Exception as e:
+            self.stats.errors += 1
+            self.logger.warning(f"cache get failed: {e}", extra={"namespace": namespace})
+            return None
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+            self.stats.bytes_read += len(value)
+        return value
+
+    async def set_bytes(self, namespace: str, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        try:
+            await self.backend.set(f"{namespace}:{key}", value, ttl_s)
+        except Exception as e:
+            self.stats.errors += 1
+            self.logger.warning(f"cache set failed: {e}", extra={"namespace": namespace})
+            return
+        self.stats.sets += 1
+        self.stats.bytes_written += len(value)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        try:
+            await self.backend.delete(f"{namespace}:{key}")
+        except Exception as e:
+            self.stats.errors += 1
+            self.logger.warning(f"cache delete failed: {e}", extra={"namespace": namespace})
+
+    async def get_json(self, namespace: str, key: str) -> Any:
+        raw = await self.get_bytes(namespace, key)
+        return None if raw is None else json.loads(raw)
+
+    async def set_json(self, namespace: str, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        await self.set_bytes(namespace, key, _dumps(value), ttl_s)
+
+    async def get_or_load_bytes(
+        self, namespace: str, key: str, loader: Callable[[], Awaitable[bytes]], ttl_s: Optional[float] = None,
+    ) -> bytes:
+        cached = await self.get_bytes(namespace, key)
+        if cached is not None:
+            return cached
+        return await self.inflight.do(f"{namespace}:{key}", lambda: self._load_locked(namespace, key, loader, ttl_s))
+
+    async def get_or_load_json(
+        self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]], ttl_s: Optional[float] = None,
+    ) -> Any:
+        async def _load() -> bytes:
+            return _dumps(await loader())
+
+        return json.loads(await self.get_or_load_bytes(namespace, key, _load, ttl_s))
+
+    async def _load_locked(
+        self, namespace: str, key: str, loader: Callable[[], Awaitable[bytes]], ttl_s: Optional[float],
+    ) -> bytes:
+        lock_key = f"lock:{namespace}:{key}"
+        token = uuid.uuid4().hex.encode()
+        try:
+            locked = await self.backend.add(lock_key, token, settings.CACHE_LOCK_TTL_S)
+        except Exception:
+            locked = True  # no lock service; just load
+        if not locked:
+            self.stats.lock_waits += 1
+            deadline = time.monotonic() + settings.CACHE_LOCK_WAIT_S
+            while time.monotonic() < deadline:
+                await asyncio.sleep(settings.CACHE_LOCK_POLL_S)
+                try:
+                    value = await self.backend.get(f"{namespace}:{key}")
+                except Exception:
+                    break
+                if value is not None:
+                    self.stats.hits += 1
+                    self.stats.bytes_read += len(value)
+                    return value
+                # Lock gone without a value (the holder's loader failed, e.g. a
+                # rejected token): take it and load now instead of waiting it out
+                try:
+                    locked = await self.backend.add(lock_key, token, settings.CACHE_LOCK_TTL_S)
+                except Exception:
+                    break
+                if locked:
+                    break
+        self.stats.loads += 1
+        try:
+            value = await loader()
+            await self.set_bytes(namespace, key, value, ttl_s)
+            return value
+        finally:
+            # Unconditional: an expired lock re-taken by another worker only costs it a duplicate load
+            if locked:
+                await self.delete("lock", f"{namespace}:{key}")
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def get_stats(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "backend": self.backend.name,
+            "size_bytes": self.backend.size_bytes(),
+            "singleflight": self.inflight.get_stats(),
+        }
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _backend_from_settings() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis" and settings.REDIS_URL:
+        return RedisBackend(
+            settings.REDIS_URL, settings.CACHE_REDIS_POOL_SIZE, settings.CACHE_REDIS_TIMEOUT_S, settings.CACHE_KEY_PREFIX,
+        )
+    return MemoryBackend(settings.CACHE_MAX_BYTES, settings.CACHE_MAX_ENTRIES)
+
+
+# Global instance (per worker; shared across workers with the redis backend)
+cache = Cache(_backend_from_settings())
+
+registry.callback(
+    "cache_events_total", "Shared cache hits, misses, sets, evictions and bytes",
+    lambda: {(k,): v for k, v in asdict(cache.stats).items()},
+    ("event",), type="counter",
+)
+registry.callback(
+    "cache_size_bytes", "Bytes held by the in-process cache backend",
+    lambda: cache.backend.size_bytes(),
+)
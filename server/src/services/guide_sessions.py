@@ -0,0 +1,294 @@
+# src/services/guide_sessions.py
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+import logging
+
+from ..core.config import settings
+from ..core.metrics import registry
+
+# Frame kinds after which a subscriber has nothing more to wait for
+TERMINAL_KINDS = ("eos", "error")
+
+
+@dataclass
+class Frame:
+    """One outgoing WebSocket message, kept so it can be delivered again"""
+    kind: str  # meta | text | audio | eos | error
+    data: Optional[Union[str, bytes]]  # None once an audio payload was released
+    seq: Optional[int] = None  # audio segment seq
+    text_start: int = 0  # transcript offset of a text delta
+    delta: str = ""
+
+
+class SessionUnavailable(Exception):
+    """A join that cannot be served; code is sent to the client"""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+@dataclass
+class ResumePoint:
+    """What a reconnecting client already has"""
+    last_seq: int = -1  # last audio segment received
+    text_offset: int = 0  # transcript characters received
+
+
+@dataclass
+class GuideSessionStats:
+    created: int = 0
+    resumed: int = 0
+    resume_missed: int = 0
+    detached: int = 0
+    joined: int = 0
+    join_missed: int = 0
+    join_full: int = 0
+    slow_dropped: int = 0  # a send to the subscriber took longer than GUIDE_SUBSCRIBER_SEND_TIMEOUT_S
+    expired: int = 0
+    abandoned: int = 0  # still generating when the grace period ran out
+    audio_released: int = 0
+
+
+class GuideSession:
+    """Output of one guide generation, decoupled from the socket that asked for it.
+
+    The orchestrator publishes frames here instead of writing to a WebSocket.
+    Frames are appended to a journal and each attached socket is served from
+    its own cursor, so a slow or dropped socket never holds up generation or
+    the other listeners, a reconnecting client can pick up where it left off,
+    and a listener joining late gets the history first. Audio payloads beyond
+    GUIDE_SESSION_BUFFER_MAX_BYTES are released oldest first; those segments
+    are skipped on resume and can be fetched with `replay`.
+    """
+
+    def __init__(self, registry_: "GuideSessionRegistry", guide_id: str, device_id: str):
+        self.guide_id = guide_id
+        self.device_id = device_id
+        self.frames: List[Frame] = []
+        self.text_length = 0
+        self.buffered_bytes = 0
+        self.subscribers = 0
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+        self._registry = registry_
+        self._released = 0  # frames[:_released] were checked for releasable audio
+        self._wakeup = asyncio.Event()
+        self._expiry: Optional[asyncio.TimerHandle] = None
+
+    # -- producer side -----------------------------------------------------
+
+    def run(self, work: Awaitable[None], cleanup: Optional[Callable[[], None]] = None) -> None:
+        """Run the generation as a task owned by the session"""
+        self.task = asyncio.create_task(self._run(work, cleanup))
+
+    async def _run(self, work: Awaitable[None], cleanup: Optional[Callable[[], None]]) -> None:
+        try:
+            await work
+        finally:
+            if cleanup is not None:
+                cleanup()
+            self.done = True
+            self._notify()
+
+    def publish_json(self, payload: dict) -> int:
+        """Append a JSON message; returns its encoded size"""
+        text = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+        kind = payload.get("type", "")
+        frame = Frame(kind=kind, data=text)
+        if kind == "text":
+            frame.delta = payload.get("delta", "")
+            frame.text_start = self.text_length
+            self.text_length += len(frame.delta)
+        size = len(text.encode("utf-8"))
+        self._append(frame, size)
+        return size
+
+    def publish_audio(self, data: bytes, seq: int) -> int:
+        """Append a binary audio segment (header + payload)"""
+        self._append(Frame(kind="audio", data=data, seq=seq), len(data))
+        return len(data)
+
+    def _append(self, frame: Frame, size: int) -> None:
+        self.frames.append(frame)
+        self.buffered_bytes += size
+        if self.buffered_bytes > settings.GUIDE_SESSION_BUFFER_MAX_BYTES:
+            self._release_audio()
+        self._notify()
+
+    def _release_audio(self) -> None:
+        while self.buffered_bytes > settings.GUIDE_SESSION_BUFFER_MAX_BYTES and self._released < len(self.frames) - 1:
+            frame = self.frames[self._released]
+            self._released += 1
+            if frame.kind == "audio" and frame.data is not None:
+                self.buffered_bytes -= len(frame.data)
+                frame.data = None
+                self._registry.stats.audio_released += 1
+
+    def _notify(self) -> None:
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    # -- consumer side -----------------------------------------------------
+
+    async def serve(self, websocket, resume: Optional[ResumePoint] = None) -> bool:
+        """Send the journal and then live frames to one socket.
+
+        Returns True once a terminal frame (or the end of generation) was
+        delivered, False if the socket failed; generation goes on either way.
+        """
+        self._attach()
+        try:
+            cursor = 0
+            while True:
+                while cursor < len(self.frames):
+                    frame = self.frames[cursor]
+                    cursor += 1
+                    data = self._view(frame, resume)
+                    if data is None:
+                        continue
+                    send = websocket.send_bytes(data) if isinstance(data, bytes) else websocket.send_text(data)
+                    await asyncio.wait_for(send, settings.GUIDE_SUBSCRIBER_SEND_TIMEOUT_S)
+                    if frame.kind in TERMINAL_KINDS:
+                        return True
+                if self.done:
+                    return True
+                await self._wakeup.wait()
+        except asyncio.TimeoutError:
+            # Stalled connection; drop it rather than buffer for it forever
+            self._registry.stats.slow_dropped += 1
+            self._registry.logger.info("guide session subscriber too slow, dropped", extra={"guideId": self.guide_id})
+            return False
+        except Exception as e:
+            self._registry.stats.detached += 1
+            self._registry.logger.info("guide session detached", extra={"guideId": self.guide_id, "error": str(e)})
+            return False
+        finally:
+            self._detach()
+
+    @staticmethod
+    def _view(frame: Frame, resume: Optional[ResumePoint]) -> Optional[Union[str, bytes]]:
+        """The frame as this subscriber should get it; None to skip"""
+        if resume is None or frame.data is None:
+            return frame.data
+        if frame.kind == "meta":
+            return None  # the client already has it
+        if frame.kind == "audio":
+            return frame.data if frame.seq is not None and frame.seq > resume.last_seq else None
+        if frame.kind == "text":
+            skip = resume.text_offset - frame.text_start
+            if skip <= 0:
+                return frame.data
+            if skip >= len(frame.delta):
+                return None
+            return json.dumps({"type": "text", "delta": frame.delta[skip:]}, separators=(",", ":"), ensure_ascii=False)
+        return frame.data
+
+    def _attach(self) -> None:
+        self.subscribers += 1
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+
+    def _detach(self) -> None:
+        self.subscribers -= 1
+        if self.subscribers <= 0:
+            self.schedule_expiry()
+
+    def schedule_expiry(self) -> None:
+        """Forget the session GUIDE_SESSION_GRACE_S from now unless a socket attaches"""
+        if self._expiry is not None:
+            self._expiry.cancel()
+        self._expiry = asyncio.get_running_loop().call_later(settings.GUIDE_SESSION_GRACE_S, self._expire)
+
+    def _expire(self) -> None:
+        self._expiry = None
+        if self.subscribers > 0:
+            return
+        if self.task is not None and not self.task.done():
+            # Nobody came back; stop paying for LLM and TTS
+            self._registry.stats.abandoned += 1
+            self.task.cancel()
+        self._registry.remove(self)
+
+
+class GuideSessionRegistry:
+    """Guide sessions of this worker, keyed by guideId.
+
+    A session outlives its socket by GUIDE_SESSION_GRACE_S so a client that
+    changed networks can send `resume` instead of a new `init`, and a guide
+    started over HTTP (POST /guide/start) runs before any socket subscribes
+    to it. Sessions are per worker; a resume that lands on another worker
+    misses and the client falls back to `replay`.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("service.guide_sessions")
+        self.sessions: Dict[str, GuideSession] = {}
+        self.stats = GuideSessionStats()
+
+    def create(self, device_id: str) -> GuideSession:
+        session = GuideSession(self, f"guide_{uuid.uuid4().hex[:12]}", device_id)
+        self.sessions[session.guide_id] = session
+        self.stats.created += 1
+        # Expires unless a socket attaches
+        session.schedule_expiry()
+        return session
+
+    def get(self, guide_id: str) -> Optional[GuideSession]:
+        return self.sessions.get(guide_id)
+
+    def join(self, guide_id: str) -> GuideSession:
+        """Session for another listener of a guide; raises SessionUnavailable"""
+        session = self.sessions.get(guide_id)
+        if session is None:
+            self.stats.join_missed += 1
+            raise SessionUnavailable("JOIN_NOT_FOUND", "Guide is not being generated on this server")
+        if session.subscribers >= settings.GUIDE_SESSION_MAX_SUBSCRIBERS:
+            self.stats.join_full += 1
+            raise SessionUnavailable("JOIN_FULL", "Too many listeners for this guide")
+        self.stats.joined += 1
+        return session
+
+    def resume(self, guide_id: str) -> Optional[GuideSession]:
+        session = self.sessions.get(guide_id)
+        if session is None:
+            self.stats.resume_missed += 1
+        else:
+            self.stats.resumed += 1
+        return session
+
+    def remove(self, session: GuideSession) -> None:
+        if self.sessions.get(session.guide_id) is session:
+            del self.sessions[session.guide_id]
+            self.stats.expired += 1
+
+    def get_stats(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "sessions": len(self.sessions),
+            "subscribers": sum(s.subscribers for s in self.sessions.values()),
+            "buffered_bytes": sum(s.buffered_bytes for s in self.sessions.values()),
+        }
+
+
+# Global instance (per worker)
+guide_sessions = GuideSessionRegistry()
+
+registry.callback(
+    "guide_session_events_total", "Guide session lifecycle events (create, resume, expiry)",
+    lambda: {(k,): v for k, v in asdict(guide_sessions.stats).items()},
+    ("event",), type="counter",
+)
+registry.callback(
+    "guide_sessions_buffered_bytes", "Frames held by guide sessions for resuming clients",
+    lambda: sum(s.buffered_bytes for s in guide_sessions.sessions.values()),
+)
+registry.callback(
+    "guide_session_subscribers", "Sockets attached to guide sessions (originators and listeners)",
+    lambda: sum(s.subscribers for s in guide_sessions.sessions.values()),
+)
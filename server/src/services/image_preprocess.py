@@ -0,0 +1,184 @@
+# src/services/image_preprocess.py
+import asyncio
+import base64
+import binascii
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Optional, Union
+import logging
+
+from PIL import Image, ImageOps
+
+from ..core.config import settings
+
+EXIF_ORIENTATION = 0x0112
+
+
+class ImagePreprocessError(ValueError):
+    """Raised when the client image cannot be decoded"""
+
+
+@dataclass
+class PreprocessResult:
+    """JPEG produced by the preprocessing stage plus per-request stats"""
+    data: bytes
+    width: int
+    height: int
+    original_bytes: int
+    elapsed_ms: float
+    resized: bool
+    phash: int = 0
+
+    @property
+    def output_bytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.output_bytes
+
+    @property
+    def base64(self) -> str:
+        return base64.b64encode(self.data).decode("ascii")
+
+    @property
+    def data_url(self) -> str:
+        return f"data:image/jpeg;base64,{self.base64}"
+
+
+@dataclass
+class PreprocessStats:
+    """Aggregate counters across requests"""
+    requests: int = 0
+    failures: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    total_ms: float = 0.0
+
+
+def dhash(img: Image.Image, size: int = 8) -> int:
+    """64-bit difference hash: compares each pixel with its right neighbour.
+
+    Robust to re-encoding, small exposure changes and slight camera shake, which
+    is what consecutive frames of the same scene look like.
+    """
+    small = img.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR)
+    px = small.tobytes()
+    bits = 0
+    for row in range(size):
+        base = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (px[base + col] < px[base + col + 1])
+    return bits
+
+
+def decode_image_input(image: str) -> bytes:
+    """Decode a base64 string or data URL (data:image/*;base64,...) into raw bytes"""
+    if image.startswith("data:"):
+        _, _, image = image.partition(",")
+    try:
+        return base64.b64decode(image, validate=False)
+    except (binascii.Error, ValueError) as e:
+        raise ImagePreprocessError(f"Invalid base64 image: {e}")
+
+
+class ImagePreprocessor:
+    """Decode, EXIF-orient and downscale client images before model calls.
+
+    Pillow releases the GIL while decoding and resampling, so the work runs on a
+    small thread pool and the event loop stays free.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.logger = logging.getLogger("service.image_preprocess")
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.IMAGE_PREPROCESS_WORKERS,
+            thread_name_prefix="image-preprocess",
+        )
+        self.stats = PreprocessStats()
+
+    async def process(
+        self,
+        image: Union[str, bytes],
+        max_edge: Optional[int] = None,
+        quality: Optional[int] = None,
+    ) -> PreprocessResult:
+        """Return a JPEG no larger than `max_edge` on its long side
+
+        Args:
+            image: Raw bytes, base64 string or data URL
+            max_edge: Long edge in pixels (defaults to IMAGE_MAX_EDGE_PX)
+            quality: JPEG quality (defaults to IMAGE_JPEG_QUALITY)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self.executor,
+                self._process_sync,
+                image,
+                max_edge or settings.IMAGE_MAX_EDGE_PX,
+                quality or settings.IMAGE_JPEG_QUALITY,
+            )
+        except Exception:
+            self.stats.failures += 1
+            raise
+        self.stats.requests += 1
+        self.stats.bytes_in += result.original_bytes
+        self.stats.bytes_out += result.output_bytes
+        self.stats.total_ms += result.elapsed_ms
+        self.logger.info("image preprocessed", extra={
+            "bytesIn": result.original_bytes,
+            "bytesOut": result.output_bytes,
+            "bytesSaved": result.bytes_saved,
+            "elapsedMs": result.elapsed_ms,
+            "size": f"{result.width}x{result.height}",
+        })
+        return result
+
+    def get_stats(self) -> dict:
+        return asdict(self.stats)
+
+    def _process_sync(self, image: Union[str, bytes], max_edge: int, quality: int) -> PreprocessResult:
+        started = time.perf_counter()
+        raw = decode_image_input(image) if isinstance(image, str) else image
+        try:
+            img = Image.open(io.BytesIO(raw))
+            source_format = img.format
+            resized = max(img.size) > max_edge
+            rotated = img.getexif().get(EXIF_ORIENTATION, 1) != 1
+            # Let the JPEG decoder skip to a reduced scale before the exact resample
+            img.draft("RGB", (max_edge, max_edge))
+            oriented = ImageOps.exif_transpose(img)
+        except Exception as e:
+            raise ImagePreprocessError(f"Cannot decode image: {e}")
+
+        if resized:
+            oriented.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        if not resized and not rotated and source_format == "JPEG":
+            # Already small enough; re-encoding would only cost time
+            data = raw
+        else:
+            if oriented.mode != "RGB":
+                oriented = oriented.convert("RGB")
+            buf = io.BytesIO()
+            oriented.save(buf, format="JPEG", quality=quality, optimize=True)
+            data = buf.getvalue()
+
+        width, height = oriented.size
+        phash = dhash(oriented)
+        return PreprocessResult(
+            data=data,
+            width=width,
+            height=height,
+            original_bytes=len(raw),
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+            resized=resized,
+            phash=phash,
+        )
+
+
+# Global instance
+image_preprocessor = ImagePreprocessor()
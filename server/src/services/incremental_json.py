@@ -0,0 +1,91 @@
+# src/services/incremental_json.py
+import json
+from typing import Any, Dict, List
+
+
+class IncrementalArrayParser:
+    """Yield the objects of one JSON array as soon as each is complete.
+
+    Feed model output in arbitrary chunks; every call to feed() returns the
+    objects of the `key` array that were closed by that chunk. Text before the
+    array (code fences, prose) is skipped, and a truncated or malformed tail
+    simply produces nothing more, so whatever was complete is kept.
+    """
+
+    def __init__(self, key: str = "candidates"):
+        self.marker = f'"{key}"'
+        self.buffer = ""
+        self.pos = 0  # next character to scan
+        self.in_array = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.item_start = -1
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        if self.done or not chunk:
+            return []
+        self.buffer += chunk
+        if not self.in_array and not self._find_array():
+            return []
+        items: List[Dict[str, Any]] = []
+        buf = self.buffer
+        i = self.pos
+        while i < len(buf):
+            ch = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                if self.depth == 0:
+                    self.item_start = i
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0 and self.item_start >= 0:
+                    item = self._decode(buf[self.item_start:i + 1])
+                    if item is not None:
+                        items.append(item)
+                    self.item_start = -1
+                elif self.depth < 0:
+                    self.done = True
+                    break
+            elif ch == "]" and self.depth == 0:
+                self.done = True
+                break
+            i += 1
+        self.pos = i
+        # Drop consumed text; keep only the object currently being read
+        keep = self.item_start if self.item_start >= 0 else self.pos
+        self.buffer = self.buffer[keep:]
+        self.pos -= keep
+        if self.item_start >= 0:
+            self.item_start = 0
+        return items
+
+    def _find_array(self) -> bool:
+        at = self.buffer.find(self.marker)
+        if at < 0:
+            return False
+        bracket = self.buffer.find("[", at + len(self.marker))
+        if bracket < 0:
+            return False
+        self.in_array = True
+        self.buffer = self.buffer[bracket + 1:]
+        self.pos = 0
+        return True
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
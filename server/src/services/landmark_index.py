@@ -0,0 +1,178 @@
+# src/services/landmark_index.py
+import asyncio
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Optional
+import logging
+
+from ..core.config import settings
+from ..core.geo import geohash_encode, geohash_neighbors, distance_m
+from ..core.supabase import supabase_admin
+from ..mappers.guide_mapper import GuideMapper
+
+# ~153m x 153m cells; a lookup scans the cell and its 8 neighbours
+INDEX_GEOHASH_PRECISION = 7
+# Cap per cell so one very popular spot cannot grow without bound
+MAX_POINTS_PER_CELL = 500
+REFRESH_PAGE_SIZE = 1000
+
+
+@dataclass
+class _Point:
+    identify_id: str
+    lat: float
+    lng: float
+    spot: str
+    confidence: float
+    created_at: datetime
+
+
+@dataclass
+class LandmarkPrior:
+    """Dominant historical identification around a position"""
+    spot: str
+    support: int
+    share: float
+    confidence: float
+    radius_m: float
+
+    @property
+    def strong(self) -> bool:
+        """Dense, unambiguous cluster: answer without a vision call"""
+        return (
+            self.support >= settings.LANDMARK_PRIOR_MIN_SUPPORT
+            and self.share >= settings.LANDMARK_PRIOR_MIN_SHARE
+        )
+
+
+class LandmarkIndex:
+    """In-memory geohash grid of high-confidence historical identifications.
+
+    Filled from identify_sessions (source 'vision' only, so answers given by the
+    index itself never reinforce it) and refreshed incrementally by created_at
+    watermark. Identifications made by this worker are added immediately.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("service.landmark_index")
+        self.cells: Dict[str, Deque[_Point]] = defaultdict(lambda: deque(maxlen=MAX_POINTS_PER_CELL))
+        self.seen: Dict[str, _Point] = {}
+        self.watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the periodic refresh loop on the running event loop"""
+        if self._task is None and settings.LANDMARK_PRIOR_ENABLED:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"landmark index refresh failed: {e}")
+            await asyncio.sleep(settings.LANDMARK_PRIOR_REFRESH_S)
+
+    async def refresh(self) -> int:
+        """Pull identifications newer than the watermark; returns rows added"""
+        mapper = GuideMapper(supabase_admin)
+        lookback_start = datetime.now(timezone.utc) - timedelta(days=settings.LANDMARK_PRIOR_LOOKBACK_DAYS)
+        since = max(self.watermark, lookback_start) if self.watermark else lookback_start
+        added = 0
+        while True:
+            rows = await mapper.get_identify_sessions_since(
+                since=since,
+                min_confidence=settings.LANDMARK_PRIOR_MIN_CONFIDENCE,
+                limit=REFRESH_PAGE_SIZE,
+            )
+            for row in rows:
+                if row.lat is None or row.lng is None or not row.spot or row.source not in (None, "vision"):
+                    continue
+                if self.add(row.identify_id, row.lat, row.lng, row.spot, row.confidence or 0.0, row.created_at):
+                    added += 1
+            if len(rows) < REFRESH_PAGE_SIZE or rows[-1].created_at == since:
+                if rows:
+                    self.watermark = rows[-1].created_at
+                break
+            since = rows[-1].created_at
+            self.watermark = since
+        self._prune(lookback_start)
+        if added:
+            self.logger.info("landmark index refreshed", extra={"added": added, "points": len(self.seen)})
+        return added
+
+    def add(
+        self,
+        identify_id: str,
+        lat: float,
+        lng: float,
+        spot: str,
+        confidence: float,
+        created_at: Optional[datetime] = None,
+    ) -> bool:
+        if identify_id in self.seen or confidence < settings.LANDMARK_PRIOR_MIN_CONFIDENCE:
+            return False
+        created = created_at or datetime.now(timezone.utc)
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        point = _Point(identify_id, lat, lng, spot, confidence, created)
+        cell = self.cells[geohash_encode(lat, lng, INDEX_GEOHASH_PRECISION)]
+        if len(cell) == cell.maxlen:
+            self.seen.pop(cell[0].identify_id, None)
+        cell.append(point)
+        self.seen[identify_id] = point
+        return True
+
+    def lookup(self, lat: float, lng: float, accuracy_m: Optional[int]) -> Optional[LandmarkPrior]:
+        """Return the dominant spot within the position's uncertainty radius"""
+        if not settings.LANDMARK_PRIOR_ENABLED or not self.seen:
+            return None
+        if accuracy_m is not None and accuracy_m > settings.LANDMARK_PRIOR_MAX_ACCURACY_M:
+            return None
+        radius = max(float(accuracy_m or 0), settings.LANDMARK_PRIOR_MIN_RADIUS_M)
+        weights: Dict[str, float] = defaultdict(float)
+        counts: Dict[str, int] = defaultdict(int)
+        total = 0
+        for key in geohash_neighbors(geohash_encode(lat, lng, INDEX_GEOHASH_PRECISION)):
+            for p in self.cells.get(key, ()):
+                if distance_m(lat, lng, p.lat, p.lng) > radius:
+                    continue
+                counts[p.spot] += 1
+                weights[p.spot] += p.confidence
+                total += 1
+        if not total:
+            return None
+        spot = max(weights, key=weights.__getitem__)
+        support = counts[spot]
+        return LandmarkPrior(
+            spot=spot,
+            support=support,
+            share=round(support / total, 3),
+            confidence=round(weights[spot] / support, 3),
+            radius_m=radius,
+        )
+
+    def _prune(self, before: datetime) -> None:
+        for key in list(self.cells):
+            cell = self.cells[key]
+            while cell and cell[0].created_at < before:
+                self.seen.pop(cell.popleft().identify_id, None)
+            if not cell:
+                del self.cells[key]
+
+
+# Global instance
+landmark_index = LandmarkIndex()
@@ -0,0 +1,26 @@
+# src/services/latency.py
+from collections import deque
+from typing import Deque, Optional
+
+
+class LatencyWindow:
+    """Rolling window of recent call latencies (seconds) with percentile lookup"""
+
+    __slots__ = ("samples",)
+
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile for q in [0, 1]; None while the window is empty"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+        return ordered[idx]
@@ -0,0 +1,203 @@
+# src/services/llm_router.py
+import inspect
+import os
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import logging
+
+from ..core.config import settings
+
+
+@dataclass
+class LLMRoute:
+    """One provider/model pair that requests can be sent to"""
+    provider: str
+    model: str
+    api_key_env: Optional[str] = None  # env var holding the key; OpenAI falls back to OPENAI_API_KEY
+    api_base: Optional[str] = None
+    regions: List[str] = field(default_factory=list)  # empty = usable everywhere
+    vision: bool = True
+    # OpenAI-style `reasoning` / `text` options; dropped for providers that reject them
+    openai_options: bool = True
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    @property
+    def api_key(self) -> Optional[str]:
+        if self.api_key_env:
+            return os.getenv(self.api_key_env)
+        if self.provider == "openai":
+            return settings.OPENAI_API_KEY
+        return None
+
+
+@dataclass
+class RouteStats:
+    calls: int = 0
+    errors: int = 0
+    failovers: int = 0
+    ewma_latency_s: Optional[float] = None
+    ewma_ttft_s: Optional[float] = None
+    ewma_error: float = 0.0
+    cooldown_until: float = 0.0
+
+
+def _ewma(prev: Optional[float], sample: float, alpha: float) -> float:
+    return sample if prev is None else prev + alpha * (sample - prev)
+
+
+class LLMRouter:
+    """Pick the fastest healthy provider/model per request and fail over on errors.
+
+    Each route keeps EWMAs of total latency, time to first token and error rate.
+    A request ranks the routes that match its region and capability: healthy
+    routes first, then by TTFT (streaming) or latency inflated by the error
+    rate, with config order breaking ties. Routes whose error EWMA crosses
+    LLM_ROUTER_MAX_ERROR_RATE sit out for LLM_ROUTER_COOLDOWN_S but remain a
+    last resort. When a call fails before any output was produced, the next
+    route is tried.
+    """
+
+    def __init__(self, routes: Optional[List[LLMRoute]] = None):
+        self.logger = logging.getLogger("service.llm_router")
+        self.routes = routes if routes is not None else self._routes_from_settings()
+        self.stats: Dict[str, RouteStats] = {r.name: RouteStats() for r in self.routes}
+
+    @staticmethod
+    def _routes_from_settings() -> List[LLMRoute]:
+        if settings.LLM_ROUTES:
+            return [LLMRoute(**r) for r in settings.LLM_ROUTES]
+        routes = [LLMRoute(provider="openai", model=settings.VISION_MODEL, api_base=settings.OPENAI_BASE_URL)]
+        if settings.VISION_HEDGE_MODEL and settings.VISION_HEDGE_MODEL != settings.VISION_MODEL:
+            routes.append(LLMRoute(provider="openai", model=settings.VISION_HEDGE_MODEL, api_base=settings.OPENAI_BASE_URL))
+        return routes
+
+    def rank(self, vision: bool = False, region: Optional[str] = None, streaming: bool = False) -> List[LLMRoute]:
+        """Routes usable for this request, best first"""
+        region = region or settings.LLM_REGION
+        now = time.monotonic()
+        eligible = [
+            r for r in self.routes
+            if (not vision or r.vision) and (not r.regions or region in r.regions)
+        ]
+
+        def score(route: LLMRoute):
+            st = self.stats[route.name]
+            latency = st.ewma_ttft_s if streaming and st.ewma_ttft_s is not None else st.ewma_latency_s
+            if latency is None:
+                latency = settings.LLM_ROUTER_DEFAULT_LATENCY_S
+            # Recent errors cost retries, so they count against the route's speed
+            return (st.cooldown_until > now, latency * (1.0 + st.ewma_error))
+
+        return sorted(eligible, key=score)
+
+    def record(self, route: LLMRoute, latency_s: Optional[float], ttft_s: Optional[float] = None, error: bool = False) -> None:
+        st = self.stats[route.name]
+        alpha = settings.LLM_ROUTER_EWMA_ALPHA
+        st.calls += 1
+        st.ewma_error = _ewma(st.ewma_error, 1.0 if error else 0.0, alpha)
+        if error:
+            st.errors += 1
+            if st.ewma_error >= settings.LLM_ROUTER_MAX_ERROR_RATE:
+                st.cooldown_until = time.monotonic() + settings.LLM_ROUTER_COOLDOWN_S
+                self.logger.warning("llm route cooling down", extra={"route": route.name, "errorRate": round(st.ewma_error, 3)})
+            return
+        if latency_s is not None:
+            st.ewma_latency_s = _ewma(st.ewma_latency_s, latency_s, alpha)
+        if ttft_s is not None:
+            st.ewma_ttft_s = _ewma(st.ewma_ttft_s, ttft_s, alpha)
+
+    def _call_kwargs(self, route: LLMRoute, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        call = dict(kwargs)
+        if not route.openai_options:
+            call.pop("reasoning", None)
+            call.pop("text", None)
+        call.update(provider=route.provider, model=route.model, api_key=route.api_key)
+        if route.api_base:
+            call["api_base"] = route.api_base
+        return call
+
+    async def stream_text(
+        self,
+        vision: bool = False,
+        region: Optional[str] = None,
+        routes: Optional[List[LLMRoute]] = None,
+        on_usage: Optional[Callable[[Any], None]] = None,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """Stream output text deltas from the best route (or the given routes, in order).
+
+        Fails over to the next route while nothing has been yielded yet; once
+        text has reached the caller an error is raised instead of restarting.
+        on_usage receives the provider's usage object from the completed event.
+        """
+        from any_llm import aresponses
+        routes = routes if routes is not None else self.rank(vision=vision, region=region, streaming=True)
+        if not routes:
+            raise RuntimeError("no LLM route available for this request")
+        last_error: Optional[Exception] = None
+        for i, route in enumerate(routes):
+            if i:
+                self.stats[route.name].failovers += 1
+                self.logger.warning("llm failover", extra={"route": route.name, "error": str(last_error)})
+            started = time.monotonic()
+            ttft: Optional[float] = None
+            events = None
+            try:
+                events = await aresponses(stream=True, **self._call_kwargs(route, kwargs))
+                async for event in events:
+                    kind = getattr(event, "type", "")
+                    if kind == "response.completed" and on_usage is not None:
+                        usage = getattr(getattr(event, "response", None), "usage", None)
+                        if usage is not None:
+                            on_usage(usage)
+                    if kind != "response.output_text.delta":
+                        continue
+                    delta = getattr(event, "delta", "")
+                    if not delta:
+                        continue
+                    if ttft is None:
+                        ttft = time.monotonic() - started
+                    yield delta
+            except GeneratorExit:
+                # Caller stopped early (e.g. it already has what it needs)
+                if ttft is not None:
+                    self.record(route, None, ttft_s=ttft)
+                raise
+            except Exception as e:
+                self.record(route, None, error=True)
+                if ttft is not None:
+                    raise
+                last_error = e
+                continue
+            finally:
+                # Early stop, cancellation (hedge loser) or failover: release the
+                # upstream response now instead of holding a pooled connection until GC
+                if events is not None:
+                    await _close_stream(events)
+            self.record(route, time.monotonic() - started, ttft_s=ttft)
+            return
+        raise last_error  # type: ignore[misc]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: asdict(st) for name, st in self.stats.items()}
+
+
+async def _close_stream(events: Any) -> None:
+    """Close a provider event stream (async generator or SDK stream object)"""
+    close = getattr(events, "aclose", None) or getattr(events, "close", None)
+    if close is None:
+        return
+    try:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+    except Exception:
+        pass
+
+
+# Global instance
+llm_router = LLMRouter()
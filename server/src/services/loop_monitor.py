@@ -0,0 +1,53 @@
+# src/services/loop_monitor.py
+import asyncio
+import time
+from typing import Optional
+import logging
+
+from ..core.config import settings
+from ..core.metrics import EVENT_LOOP_LAG_S, registry
+
+
+class LoopLagMonitor:
+    """Sleep for a fixed interval and record how late each wakeup was.
+
+    Any synchronous work on the loop (SDK calls, image decoding, JSON on big
+    payloads) shows up directly as lag, for every connection on the worker.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("service.loop_monitor")
+        self._task: Optional[asyncio.Task] = None
+        self.max_lag_s = 0.0
+
+    def start(self) -> None:
+        if self._task is None and settings.LOOP_LAG_SAMPLE_INTERVAL_S > 0:
+            self._task = asyncio.create_task(self._run(settings.LOOP_LAG_SAMPLE_INTERVAL_S))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.monotonic() - expected)
+            EVENT_LOOP_LAG_S.observe(lag)
+            if lag > self.max_lag_s:
+                self.max_lag_s = lag
+
+
+# Global instance
+loop_monitor = LoopLagMonitor()
+
+registry.callback(
+    "event_loop_lag_max_seconds", "Largest event-loop lag seen since start",
+    lambda: loop_monitor.max_lag_s,
+)
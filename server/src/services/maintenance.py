@@ -0,0 +1,314 @@
+# src/services/maintenance.py
+import asyncio
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Tuple
+import logging
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+from ..core.config import settings
+from ..core.supabase import supabase_admin
+from ..mappers.device_mapper import DeviceMapper
+from ..mappers.guide_mapper import GuideMapper
+
+# Smallest batch the adaptive sizing may shrink to
+MIN_BATCH_SIZE = 10
+# Storage list() page size for the audio bucket
+STORAGE_PAGE_SIZE = 100
+
+
+@dataclass
+class JobStats:
+    """Progress counters for one maintenance job"""
+    runs: int = 0
+    batches: int = 0
+    deleted: int = 0
+    last_started_at: Optional[str] = None
+    last_duration_s: float = 0.0
+    last_deleted: int = 0
+    last_batch_size: int = 0
+    last_error: Optional[str] = None
+    skipped_leased: int = 0  # another worker holds this interval's lease
+    resume_offset: int = 0  # listing offset the next run starts from (audio_objects)
+
+
+@dataclass
+class _RunState:
+    batch_size: int
+    started: float = field(default_factory=time.monotonic)
+    deleted: int = 0
+    batches: int = 0
+
+
+class MaintenanceService:
+    """Periodic chunked cleanup of devices, identify sessions and audio objects.
+
+    Jobs run on an APScheduler background thread with their own event loop, so the
+    synchronous Supabase calls never block the serving loop. Each job deletes in
+    bounded batches: a batch that exceeds MAINTENANCE_BATCH_TIME_LIMIT_S halves the
+    next batch size, fast batches grow it back, and a pause between batches plus a
+    per-run budget keep lock and I/O pressure flat.
+
+    Every worker schedules the jobs, but a run first takes a lease row in
+    Postgres (try_acquire_maintenance_lease) that lasts most of an interval,
+    so each job runs once per interval across all workers and instances.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("service.maintenance")
+        self.scheduler: Optional["BackgroundScheduler"] = None
+        self.stats: Dict[str, JobStats] = {}
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._jobs: Dict[str, Callable[[], Awaitable[int]]] = {
+            "devices": self.cleanup_devices,
+            "identify_sessions": self.cleanup_identify_sessions,
+            "audio_objects": self.cleanup_audio_objects,
+        }
+        for name in self._jobs:
+            self.stats[name] = JobStats()
+
+    def start(self) -> None:
+        """Start the scheduler (idempotent)"""
+        if self.scheduler is not None or not settings.MAINTENANCE_ENABLED:
+            return
+        from apscheduler.schedulers.background import BackgroundScheduler
+        self.scheduler = BackgroundScheduler(daemon=True)
+        first_run = datetime.now(timezone.utc) + timedelta(minutes=1)
+        for i, name in enumerate(self._jobs):
+            self.scheduler.add_job(
+                self.run_job,
+                "interval",
+                args=[name],
+                id=f"maintenance.{name}",
+                minutes=settings.MAINTENANCE_INTERVAL_MINUTES,
+                # Stagger jobs so they never hit the database together
+                next_run_time=first_run + timedelta(seconds=30 * i),
+                max_instances=1,
+                coalesce=True,
+            )
+        self.scheduler.start()
+        self.logger.info("maintenance scheduler started", extra={
+            "jobs": list(self._jobs),
+            "intervalMinutes": settings.MAINTENANCE_INTERVAL_MINUTES,
+        })
+
+    def shutdown(self) -> None:
+        if self.scheduler is None:
+            return
+        self.scheduler.shutdown(wait=False)
+        self.scheduler = None
+
+    def run_job(self, name: str) -> int:
+        """Run one job to completion on the calling (scheduler) thread"""
+        stats = self.stats[name]
+        if not self._acquire_lease(name):
+            stats.skipped_leased += 1
+            self.logger.debug(f"maintenance job {name} skipped, lease held elsewhere", extra={"job": name})
+            return 0
+        stats.runs += 1
+        stats.last_started_at = datetime.now(timezone.utc).isoformat()
+        started = time.monotonic()
+        try:
+            deleted = asyncio.run(self._jobs[name]())
+            stats.last_error = None
+        except Exception as e:
+            deleted = 0
+            stats.last_error = str(e)
+            self.logger.exception(f"maintenance job {name} failed: {e}")
+        stats.last_duration_s = round(time.monotonic() - started, 3)
+        stats.last_deleted = deleted
+        self.logger.info(f"maintenance job {name} finished", extra={
+            "job": name,
+            "deleted": deleted,
+            "durationS": stats.last_duration_s,
+        })
+        return deleted
+
+    def _acquire_lease(self, name: str) -> bool:
+        """Take this interval's lease for a job; False if another worker has it.
+
+        Fails closed: if the lease cannot be checked the run is skipped rather
+        than risk several workers deleting the same rows at once.
+        """
+        ttl_s = max(60, int(settings.MAINTENANCE_INTERVAL_MINUTES * 60 * 0.9))
+        try:
+            response = supabase_admin.rpc("try_acquire_maintenance_lease", {
+                "p_job": name,
+                "p_holder": self.holder,
+                "p_ttl_s": ttl_s,
+            }).execute()
+        except Exception as e:
+            self.stats[name].last_error = f"lease: {e}"
+            self.logger.warning(f"maintenance lease check failed for {name}: {e}")
+            return False
+        return response.data is True
+
+    def _load_cursor(self, name: str) -> int:
+        """Offset a paged job resumes from, kept on its lease row across workers"""
+        stats = self.stats[name]
+        try:
+            response = (
+                supabase_admin.table("maintenance_leases")
+                .select("resume_offset")
+                .eq("job", name)
+                .execute()
+            )
+            if response.data:
+                stats.resume_offset = response.data[0].get("resume_offset") or 0
+        except Exception as e:
+            # Fall back to this worker's last known position
+            self.logger.warning(f"maintenance cursor load failed for {name}: {e}")
+        return stats.resume_offset
+
+    def _save_cursor(self, name: str, offset: int) -> None:
+        self.stats[name].resume_offset = offset
+        try:
+            (
+                supabase_admin.table("maintenance_leases")
+                .update({"resume_offset": offset})
+                .eq("job", name)
+                .eq("holder", self.holder)
+                .execute()
+            )
+        except Exception as e:
+            self.logger.warning(f"maintenance cursor save failed for {name}: {e}")
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {name: asdict(s) for name, s in self.stats.items()}
+
+    async def cleanup_devices(self) -> int:
+        mapper = DeviceMapper(supabase_admin)
+        return await self._run_batches("devices", _table_batch(
+            lambda size: mapper.cleanup_old_devices(settings.DEVICE_RETENTION_DAYS, size)
+        ))
+
+    async def cleanup_identify_sessions(self) -> int:
+        mapper = GuideMapper(supabase_admin)
+        return await self._run_batches("identify_sessions", _table_batch(
+            lambda size: mapper.cleanup_old_identify_sessions(settings.IDENTIFY_SESSION_RETENTION_DAYS, size)
+        ))
+
+    async def cleanup_audio_objects(self) -> int:
+        """Remove audio folders that are past retention or have no guide row.
+
+        Objects live under `{guide_id}/{seq}.mp3`. A folder is removed when its newest
+        object is older than AUDIO_RETENTION_HOURS, or when no guide row exists and the
+        newest object is older than AUDIO_ORPHAN_GRACE_MINUTES (guides are persisted at
+        eos, so younger folders may still be streaming). A guide whose audio expired
+        loses its segments but keeps its row and transcript, flagged audio_expired
+        so history and replay can say so.
+
+        Each run resumes the listing where the previous one ran out of budget and
+        wraps around at the end, so every folder is reached however many live
+        folders precede it.
+        """
+        mapper = GuideMapper(supabase_admin)
+        bucket = supabase_admin.storage.from_(settings.SUPABASE_STORAGE_BUCKET_AUDIO)
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(hours=settings.AUDIO_RETENTION_HOURS)
+        orphan_before = now - timedelta(minutes=settings.AUDIO_ORPHAN_GRACE_MINUTES)
+        offset = self._load_cursor("audio_objects")
+
+        async def _batch(size: int) -> Tuple[int, bool]:
+            nonlocal offset
+            page = min(size, STORAGE_PAGE_SIZE)
+            entries = bucket.list("", {
+                "limit": page,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"},
+            }) or []
+            # Folders come back without an id
+            folders = [e["name"] for e in entries if e.get("id") is None]
+            existing = await mapper.get_existing_guide_ids(folders)
+            removed_objects = 0
+            removed_folders = 0
+            for folder in folders:
+                files = [f for f in (bucket.list(folder, {"limit": 1000}) or []) if f.get("id") is not None]
+                if not files:
+                    continue
+                keys = [f"{folder}/{f['name']}" for f in files]
+                newest = max(_parse_ts(f.get("created_at")) for f in files)
+                stale = newest < stale_before
+                orphan = folder not in existing and newest < orphan_before
+                if not (stale or orphan):
+                    continue
+                bucket.remove(keys)
+                if folder in existing:
+                    await mapper.delete_guide_segments(folder)
+                    await mapper.mark_guide_audio_expired(folder)
+                removed_objects += len(keys)
+                removed_folders += 1
+            # Removed folders disappear from the listing, shifting later pages left
+            offset += len(entries) - removed_folders
+            has_more = len(entries) >= page
+            if not has_more:
+                offset = 0  # end of the bucket; the next run starts over
+            return removed_objects, has_more
+
+        try:
+            return await self._run_batches("audio_objects", _batch)
+        finally:
+            self._save_cursor("audio_objects", offset)
+
+    async def _run_batches(
+        self,
+        name: str,
+        batch: Callable[[int], Awaitable[Tuple[int, bool]]],
+    ) -> int:
+        """Drive `batch(size) -> (deleted, has_more)` until done or out of budget"""
+        stats = self.stats[name]
+        state = _RunState(batch_size=stats.last_batch_size or settings.MAINTENANCE_BATCH_SIZE)
+        limit_s = settings.MAINTENANCE_BATCH_TIME_LIMIT_S
+        while True:
+            batch_started = time.monotonic()
+            size = state.batch_size
+            n, has_more = await batch(size)
+            elapsed = time.monotonic() - batch_started
+            state.batches += 1
+            state.deleted += n
+            stats.batches += 1
+            stats.deleted += n
+            self.logger.debug(f"maintenance batch {name}", extra={
+                "job": name,
+                "batchSize": size,
+                "count": n,
+                "elapsedS": round(elapsed, 3),
+                "totalDeleted": state.deleted,
+            })
+
+            if elapsed > limit_s:
+                state.batch_size = max(MIN_BATCH_SIZE, size // 2)
+            elif elapsed < limit_s / 2:
+                state.batch_size = min(settings.MAINTENANCE_BATCH_SIZE, size * 2)
+            stats.last_batch_size = state.batch_size
+
+            if not has_more:
+                break
+            if time.monotonic() - state.started > settings.MAINTENANCE_RUN_BUDGET_S:
+                self.logger.info(f"maintenance job {name} hit run budget", extra={"job": name})
+                break
+            await asyncio.sleep(settings.MAINTENANCE_BATCH_PAUSE_S)
+        return state.deleted
+
+
+def _table_batch(delete: Callable[[int], Awaitable[int]]) -> Callable[[int], Awaitable[Tuple[int, bool]]]:
+    async def _batch(size: int) -> Tuple[int, bool]:
+        n = await delete(size)
+        return n, n >= size
+    return _batch
+
+
+def _parse_ts(value: Optional[str]) -> datetime:
+    if not value:
+        return datetime.now(timezone.utc)
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+# Global instance
+maintenance_service = MaintenanceService()
@@ -2,40 +2,66 @@
 import asyncio
 import json
 import base64
-import uuid
+import time
+from functools import lru_cache
 from typing import AsyncGenerator, Dict, Any, List, Optional
 from datetime import datetime
-from any_llm import aresponses
-from openai import AsyncOpenAI
-from fastapi import WebSocket
-from starlette.websockets import WebSocketState
 from ..schemas.guide import (
     InitMessage, MetaMessage, TextMessage, EosMessage, ErrorMessage,
     AudioSegmentInfo
 )
 from ..core.config import settings
+from ..core.logging import bind_log_context, reset_log_context
 from ..mappers.guide_mapper import GuideMapper
 from ..core.supabase import supabase_admin
+from .image_preprocess import image_preprocessor
+from .llm_router import llm_router
+from .upstream_guard import llm_guard, tts_guard, UpstreamUnavailable
+from .vision import vision_service
+from .timeline import StreamTimeline
+from .cache import cache
+from .guide_sessions import GuideSession
+from ..core.metrics import (
+    GUIDE_FIRST_TEXT_S, GUIDE_FIRST_AUDIO_S, GUIDE_LLM_S, GUIDE_TTS_S, GUIDE_UPLOAD_LAG_S, GUIDE_STREAMS,
+)
 import logging
 
+
+@lru_cache(maxsize=1)
+def tts_client():
+    """Shared OpenAI client for TTS: one connection pool, openai imported on first use"""
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
+
+
 class NarrativeOrchestrator:
-    """Orchestrates the complete guide streaming process"""
+    """Orchestrates the complete guide streaming process.
+
+    Output goes to a GuideSession rather than a socket, so generation is not
+    paced by (or lost with) the client connection.
+    """
     
-    def __init__(self, websocket: WebSocket, init_data: InitMessage):
-        self.ws = websocket
+    def __init__(self, session: GuideSession, init_data: InitMessage):
+        self.session = session
         self.init_data = init_data
-        self.guide_id = f"guide_{uuid.uuid4().hex[:12]}"
+        self.guide_id = session.guide_id
         self.sequence_counter = 0
         self.segments: List[AudioSegmentInfo] = []
         self.transcript_parts: List[str] = []
         self.total_duration_ms = 0
         self.logger = logging.getLogger("service.orchestrator")
-        self.llm_provider = "openai"
-        self.tts_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.tts_client = tts_client()
         self.guide_mapper = GuideMapper(supabase_admin)
+        self.spot: Optional[str] = None
+        # Monotonic start for stage metrics and the per-stream timeline
+        self.started = time.monotonic()
+        self.timeline = StreamTimeline(self.started)
+        self.timeline.mark("init_received")
     
     async def stream(self):
         """Main streaming orchestration method"""
+        # Tasks spawned below (uploads, persistence) inherit these IDs
+        log_token = bind_log_context(guideId=self.guide_id, deviceId=self.init_data.deviceId)
         try:
             self.logger.info("orchestrator start", extra={
                 "guideId": self.guide_id,
@@ -45,12 +71,16 @@ class NarrativeOrchestrator:
             })
             # 1. Send early meta message
             await self._send_meta_message()
+            self.timeline.mark("meta_sent")
             
             # 2. Perform RAG to get context
+            self.spot = await self._resolve_spot()
             context = await self._get_location_context()
+            self.timeline.mark("context_ready", spot=self.spot)
             
             # 3. Stream narrative from LLM and process in parallel
-            async for sentence in self._stream_and_chunk_llm(context, self.init_data.imageBase64):
+            image_data_url = await self._prepare_image()
+            async for sentence in self._stream_and_chunk_llm(context, image_data_url):
                 if sentence.strip():
                     # 4a. Send text delta immediately
                     await self._send_text_delta(sentence)
@@ -65,14 +95,21 @@ class NarrativeOrchestrator:
                 "segments": len(self.segments),
                 "durationMs": self.total_duration_ms,
             })
+            GUIDE_STREAMS.labels("ok").inc()
             
         except Exception as e:
+            GUIDE_STREAMS.labels("error").inc()
+            self.timeline.mark("error", error=str(e))
             self.logger.exception(f"orchestrator error: {e}")
             try:
                 await self._send_error_message("STREAM_ERROR", str(e))
             except Exception:
                 # Ignore if client already disconnected
                 pass
+        finally:
+            # One structured record per guide to find the slow stage
+            self.logger.info("guide timeline", extra={"guideId": self.guide_id, "timeline": self.timeline.to_dict()})
+            reset_log_context(log_token)
     
     async def _send_meta_message(self):
         """Send metadata about the guide"""
@@ -84,9 +121,38 @@ class NarrativeOrchestrator:
             confidence=0.8,
             estimatedDurationMs=120000  # 2 minutes estimate
         )
-        await self._safe_send_json(meta.model_dump())
+        self._publish_json(meta.model_dump())
         self.logger.info("meta sent", extra={"guideId": self.guide_id, "title": meta.title})
     
+    async def _prepare_image(self) -> Optional[str]:
+        """Downscale the client image before it is sent to the LLM"""
+        image = self.init_data.imageBase64
+        if not image or not settings.IMAGE_PREPROCESS_ENABLED:
+            return image
+        try:
+            processed = await image_preprocessor.process(image)
+            return processed.data_url
+        except Exception as e:
+            # Let the model see the original rather than failing the guide
+            self.logger.warning(f"image preprocess failed, sending original: {e}")
+            return image
+    
+    async def _resolve_spot(self) -> Optional[str]:
+        """Spot from the identify session, waiting briefly for a running high-detail pass"""
+        identify_id = self.init_data.identifyId
+        if not identify_id:
+            return None
+        pending = vision_service.escalations.get(identify_id)
+        if pending is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(pending), timeout=settings.VISION_ESCALATION_WAIT_S)
+                if result.candidates:
+                    return result.candidates[0].spot
+            except Exception:
+                pass
+        session = await self.guide_mapper.get_identify_session(identify_id)
+        return session.spot if session else None
+    
     async def _get_location_context(self) -> str:
         """Perform RAG to get relevant context for the location"""
         # This is a placeholder - in a real implementation, you would:
@@ -97,8 +163,9 @@ class NarrativeOrchestrator:
         lat, lng = self.init_data.geo.lat, self.init_data.geo.lng
         
         # Simulate context retrieval
+        spot_line = f"识别结果: {self.spot}。" if self.spot else ""
         context = f"""
-        Location: 纬度 {lat}, 经度 {lng}.
+        Location: 纬度 {lat}, 经度 {lng}. {spot_line}
         这是一张用户拍摄的现场照片。请仔细观察图片内容，并结合地理坐标，为游客提供一段有趣且信息丰富的导览解说。
         你的解说应该首先描述图片中的景象，然后可以介绍相关的历史背景、文化意义、建筑特色等。
         请使用地道、亲切的语言风格，就像一个住在附近的本地人，热情地为朋友介绍这个地方。
@@ -107,48 +174,99 @@ class NarrativeOrchestrator:
         return context
     
     async def _stream_and_chunk_llm(self, context: str, image_data_url: Optional[str]) -> AsyncGenerator[str, None]:
-        """Call any_llm Responses API with multimodal input and chunk output into sentences"""
-        try:
-            self.logger.info("LLM stream begin", extra={"guideId": self.guide_id, "hasImage": bool(image_data_url)})
+        """Stream the narrative from the routed LLM and yield it sentence by sentence"""
+        self.logger.info("LLM stream begin", extra={"guideId": self.guide_id, "hasImage": bool(image_data_url)})
 
-            # Prepare the content list for the LLM
-            user_content: List[Dict[str, Any]] = [{"type": "input_text", "text": context}]
-            if image_data_url:
-                # Based on the OpenAI documentation for vision, the content list should
-                # contain separate dictionaries for text and image.
-                user_content.append(
-                    {
-                        "type": "input_image",
-                        "image_url": image_data_url
-                    }
-                )
-
-            # Use Responses API (non-streaming) for simpler, faster integration
-            result = await aresponses(
-                provider=self.llm_provider,
-                model="gpt-5-nano",
-                input_data=[
-                    {
-                        "role": "user",
-                        "content": user_content,
-                    }
-                ],
-                instructions="你是一位本地人，为朋友提供有意思且简单的景点介绍。",
-                reasoning={"effort": "low"},
-                text={"verbosity": "low"},
-                max_output_tokens=1000,
-                api_key=settings.OPENAI_API_KEY,
+        # Prepare the content list for the LLM
+        user_content: List[Dict[str, Any]] = [{"type": "input_text", "text": context}]
+        if image_data_url:
+            # Based on the OpenAI documentation for vision, the content list should
+            # contain separate dictionaries for text and image.
+            user_content.append(
+                {
+                    "type": "input_image",
+                    "image_url": image_data_url
+                }
             )
-            full_text = getattr(result, "output_text", None) or ""
-            if not full_text.strip():
-                return
-            sentences = self._extract_sentences(full_text)
-            for sentence in sentences:
-                if sentence and sentence.strip():
-                    yield sentence
+
+        # A producer task reads the provider stream under the LLM slot, so the
+        # slot is not held while the caller voices and sends each sentence
+        deltas: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        producer = asyncio.create_task(self._read_llm(user_content, bool(image_data_url), deltas))
+        buffer = ""
+        try:
+            while (delta := await deltas.get()) is not None:
+                buffer += delta
+                cut = max(buffer.rfind(p) for p in "。！？；")
+                if cut < 0:
+                    continue
+                complete, buffer = buffer[:cut + 1], buffer[cut + 1:]
+                for sentence in self._extract_sentences(complete):
+                    if sentence and sentence.strip():
+                        self._mark_sentence(sentence)
+                        yield sentence
+        finally:
+            # Caller stopped early (error, cancellation): stop reading the provider
+            if not producer.done():
+                producer.cancel()
+
+        try:
+            await producer
+        except UpstreamUnavailable as e:
+            # Fail fast while the LLM upstream recovers instead of queueing the guide
+            self.logger.warning(f"LLM unavailable, sending fallback: {e}")
+            yield self._fallback_narrative()
+            return
         except Exception as e:
             self.logger.exception(f"LLM streaming error: {e}")
             yield "抱歉，导览服务暂时不可用。"
+            return
+        if buffer.strip():
+            self._mark_sentence(buffer.strip())
+            yield buffer.strip()
+
+    async def _read_llm(self, user_content: List[Dict[str, Any]], vision: bool, out: "asyncio.Queue[Optional[str]]") -> None:
+        """Drain the provider stream into `out`, then put None; only this task holds the LLM slot"""
+        try:
+            llm_started = time.monotonic()
+            self.timeline.mark("llm_request")
+            async with llm_guard.slot() as slot:
+                async for delta in llm_router.stream_text(
+                    vision=vision,
+                    input_data=[
+                        {
+                            "role": "user",
+                            "content": user_content,
+                        }
+                    ],
+                    instructions="你是一位本地人，为朋友提供有意思且简单的景点介绍。",
+                    reasoning={"effort": "low"},
+                    text={"verbosity": "low"},
+                    max_output_tokens=1000,
+                    on_usage=self._record_llm_usage,
+                ):
+                    if slot.first_token_s is None:
+                        self.timeline.mark("llm_first_token")
+                    slot.first_token()
+                    out.put_nowait(delta)
+            # Request to end of the provider stream; TTS and sends are not included
+            GUIDE_LLM_S.observe(time.monotonic() - llm_started)
+            self.timeline.mark("llm_done")
+        finally:
+            out.put_nowait(None)
+    
+    def _mark_sentence(self, sentence: str) -> None:
+        self.timeline.usage.sentences += 1
+        self.timeline.mark("sentence", idx=self.timeline.usage.sentences, chars=len(sentence))
+    
+    def _record_llm_usage(self, usage: Any) -> None:
+        self.timeline.usage.llm_input_tokens += getattr(usage, "input_tokens", 0) or 0
+        self.timeline.usage.llm_output_tokens += getattr(usage, "output_tokens", 0) or 0
+    
+    def _fallback_narrative(self) -> str:
+        """Cheap canned line used while the LLM upstream is shedding load"""
+        lat, lng = self.init_data.geo.lat, self.init_data.geo.lng
+        return f"你正位于纬度 {lat:.4f}、经度 {lng:.4f} 附近。讲解服务此刻有些繁忙，请稍后再试一次。"
     
     def _extract_sentences(self, text: str) -> List[str]:
         """Extract complete sentences from text buffer"""
@@ -174,7 +292,10 @@ class NarrativeOrchestrator:
     async def _send_text_delta(self, text: str):
         """Send text delta to client"""
         message = TextMessage(type="text", delta=text)
-        await self._safe_send_json(message.model_dump())
+        sent = self._publish_json(message.model_dump())
+        self.timeline.mark("text_sent", bytes=sent)
+        if not self.transcript_parts:
+            GUIDE_FIRST_TEXT_S.observe(time.monotonic() - self.started)
         self.logger.debug("text delta sent", extra={"len": len(text)})
         self.transcript_parts.append(text)
     
@@ -198,7 +319,10 @@ class NarrativeOrchestrator:
                 
                 # Send binary audio data
                 header = self._create_binary_header(segment_info)
-                await self._safe_send_bytes(header + audio_bytes)
+                self._publish_audio(header + audio_bytes, segment_info.seq)
+                self.timeline.mark("audio_sent", seq=segment_info.seq, bytes=len(header) + len(audio_bytes))
+                if not self.segments:
+                    GUIDE_FIRST_AUDIO_S.observe(time.monotonic() - self.started)
                 self.logger.info("audio segment sent", extra={
                     "seq": segment_info.seq,
                     "bytes": segment_info.bytes_len,
@@ -209,28 +333,40 @@ class NarrativeOrchestrator:
                 self.total_duration_ms = segment_info.end_ms
                 self.sequence_counter += 1
                 
-                # Store in Supabase storage (non-blocking)
+                # Store in Supabase storage (non-blocking); keep a copy warm for replays
                 asyncio.create_task(self._store_audio_segment(segment_info, audio_bytes))
+                asyncio.create_task(cache.set_bytes("audio", segment_info.object_key, audio_bytes, settings.AUDIO_CACHE_TTL_S))
                 
         except Exception as e:
             self.logger.exception(f"Audio processing error: {e}")
     
     async def _generate_audio(self, text: str) -> bytes:
         """Generate audio from text using OpenAI TTS"""
+        seq = self.sequence_counter
+        self.timeline.usage.tts_chars += len(text)
+        self.timeline.mark("tts_start", seq=seq, chars=len(text))
         try:
-            resp = await self.tts_client.audio.speech.create(
-                model="tts-1",
-                voice="alloy",
-                input=text,
-                response_format="mp3",
-            )
-            # The SDK returns a streaming/binary content wrapper
-            try:
-                content = await resp.content.read()  # type: ignore[attr-defined]
-            except Exception:
-                # Fallback for older SDKs that return bytes directly
-                content = getattr(resp, "content", b"")
+            tts_started = time.monotonic()
+            async with tts_guard.slot():
+                resp = await self.tts_client.audio.speech.create(
+                    model="tts-1",
+                    voice="alloy",
+                    input=text,
+                    response_format="mp3",
+                )
+                # The SDK returns a streaming/binary content wrapper
+                try:
+                    content = await resp.content.read()  # type: ignore[attr-defined]
+                except Exception:
+                    # Fallback for older SDKs that return bytes directly
+                    content = getattr(resp, "content", b"")
+            GUIDE_TTS_S.observe(time.monotonic() - tts_started)
+            self.timeline.mark("tts_end", seq=seq, bytes=len(content or b""))
             return content or b""
+        except UpstreamUnavailable as e:
+            # Text-only while TTS recovers
+            self.logger.warning(f"TTS unavailable, skipping audio: {e}")
+            return b""
         except Exception as e:
             self.logger.exception(f"TTS generation error: {e}")
             return b""
@@ -255,6 +391,8 @@ class NarrativeOrchestrator:
     
     async def _store_audio_segment(self, segment_info: AudioSegmentInfo, audio_bytes: bytes):
         """Store audio segment in Supabase storage"""
+        # Scheduled right after the segment was sent, so this measures upload lag
+        sent_at = time.monotonic()
         try:
             from ..core.supabase import supabase_admin
             
@@ -269,6 +407,8 @@ class NarrativeOrchestrator:
             error_attr = getattr(result, "error", None)
             if error_attr:
                 self.logger.warning("storage upload error", extra={"error": str(error_attr)})
+            else:
+                GUIDE_UPLOAD_LAG_S.observe(time.monotonic() - sent_at)
                 
         except Exception as e:
             self.logger.exception(f"Storage error: {e}")
@@ -282,7 +422,10 @@ class NarrativeOrchestrator:
             totalDurationMs=self.total_duration_ms,
             transcript=transcript
         )
-        await self._safe_send_json(message.model_dump())
+        self.timeline.mark("eos")
+        if settings.GUIDE_TIMELINE_IN_EOS:
+            message.timeline = self.timeline.to_dict()
+        self._publish_json(message.model_dump(exclude_none=True))
         self.logger.info("eos sent", extra={
             "guideId": self.guide_id,
             "totalDurationMs": self.total_duration_ms,
@@ -292,7 +435,7 @@ class NarrativeOrchestrator:
             await self.guide_mapper.create_guide(
                 guide_id=self.guide_id,
                 device_id=self.init_data.deviceId,
-                spot="",
+                spot=self.spot or "",
                 title=f"探索{self.init_data.geo.lat:.4f}, {self.init_data.geo.lng:.4f}",
                 transcript=transcript,
                 duration_ms=self.total_duration_ms,
@@ -312,32 +455,15 @@ class NarrativeOrchestrator:
             code=code,
             message=message
         )
-        await self._safe_send_json(error.model_dump())
+        self._publish_json(error.model_dump())
         self.logger.error("error message sent", extra={"code": code, "message": message})
 
-    async def _safe_send_json(self, payload: dict) -> None:
-        """Send JSON only if socket is connected; swallow send errors."""
-        try:
-            if getattr(self.ws, "client_state", None) is not None:
-                if self.ws.client_state != WebSocketState.CONNECTED:
-                    return
-        except Exception:
-            # If client_state not available, proceed and rely on exception handling
-            pass
-        try:
-            await self.ws.send_json(payload)
-        except Exception as e:
-            self.logger.debug(f"safe send_json failed: {e}")
+    def _publish_json(self, payload: dict) -> int:
+        """Publish a JSON message to the session; returns its encoded size"""
+        sent = self.session.publish_json(payload)
+        self.timeline.usage.text_bytes_sent += sent
+        return sent
 
-    async def _safe_send_bytes(self, data: bytes) -> None:
-        """Send bytes only if socket is connected; swallow send errors."""
-        try:
-            if getattr(self.ws, "client_state", None) is not None:
-                if self.ws.client_state != WebSocketState.CONNECTED:
-                    return
-        except Exception:
-            pass
-        try:
-            await self.ws.send_bytes(data)
-        except Exception as e:
-            self.logger.debug(f"safe send_bytes failed: {e}")
\ No newline at end of file
+    def _publish_audio(self, data: bytes, seq: int) -> None:
+        """Publish a binary audio segment (header + mp3) to the session"""
+        self.timeline.usage.audio_bytes_sent += self.session.publish_audio(data, seq)
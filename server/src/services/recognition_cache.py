@@ -0,0 +1,171 @@
+# src/services/recognition_cache.py
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from ..core.config import settings
+from ..core.geo import geohash_encode, geohash_neighbors
+from ..schemas.guide import Candidate
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes with Hamming distance.
+
+    A range query only descends into children whose edge distance lies within
+    [d - radius, d + radius], so near-duplicate lookups touch a small fraction of
+    the stored hashes.
+    """
+
+    __slots__ = ("root", "size")
+
+    def __init__(self):
+        # Node layout: [hash, value, {distance: child}]
+        self.root: Optional[list] = None
+        self.size = 0
+
+    def add(self, key: int, value: Any) -> None:
+        self.size += 1
+        if self.root is None:
+            self.root = [key, value, {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(key, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [key, value, {}]
+                return
+            node = child
+
+    def search(self, key: int, radius: int) -> Iterator[Tuple[int, Any]]:
+        """Yield (distance, value) for every stored hash within `radius`"""
+        if self.root is None:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = hamming(key, node[0])
+            if d <= radius:
+                yield d, node[1]
+            lo, hi = d - radius, d + radius
+            for edge, child in node[2].items():
+                if lo <= edge <= hi:
+                    stack.append(child)
+
+
+@dataclass
+class _Entry:
+    phash: int
+    candidates: List[Candidate]
+    expires_at: float
+
+
+class _Cell:
+    __slots__ = ("tree", "entries", "expired")
+
+    def __init__(self):
+        self.tree = BKTree()
+        self.entries: List[_Entry] = []
+        self.expired = 0
+
+    def rebuild(self, now: float, max_entries: int) -> None:
+        live = [e for e in self.entries if e.expires_at > now][-max_entries:]
+        self.tree = BKTree()
+        for e in live:
+            self.tree.add(e.phash, e)
+        self.entries = live
+        self.expired = 0
+
+
+@dataclass
+class RecognitionCacheStats:
+    hits: int = 0
+    near_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evicted_cells: int = 0
+
+
+class RecognitionCache:
+    """Near-duplicate cache of vision results keyed by perceptual hash and place.
+
+    Entries are bucketed by the geohash cell of the request, and each cell keeps a
+    BK-tree of dHashes. A lookup searches the cell and its neighbours for a hash
+    within RECOGNITION_CACHE_MAX_DISTANCE bits and returns the cached candidate list,
+    including empty lists for "not a landmark" answers. Entries expire after
+    RECOGNITION_CACHE_TTL_S; cells are LRU-evicted beyond RECOGNITION_CACHE_MAX_CELLS.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("service.recognition_cache")
+        self.cells: "OrderedDict[str, _Cell]" = OrderedDict()
+        self.stats = RecognitionCacheStats()
+
+    def cell_for(self, lat: float, lng: float) -> str:
+        return geohash_encode(lat, lng, settings.RECOGNITION_CACHE_GEOHASH_PRECISION)
+
+    def get(self, lat: float, lng: float, phash: int) -> Optional[List[Candidate]]:
+        """Return a copy of the closest live cached result, or None on miss"""
+        now = time.monotonic()
+        radius = settings.RECOGNITION_CACHE_MAX_DISTANCE
+        best: Optional[Tuple[int, _Entry]] = None
+        for key in geohash_neighbors(self.cell_for(lat, lng)):
+            cell = self.cells.get(key)
+            if cell is None:
+                continue
+            for d, entry in cell.tree.search(phash, radius):
+                if entry.expires_at <= now:
+                    continue
+                if best is None or d < best[0]:
+                    best = (d, entry)
+                    if d == 0:
+                        break
+        if best is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        if best[0] > 0:
+            self.stats.near_hits += 1
+        return [c.model_copy() for c in best[1].candidates]
+
+    def put(self, lat: float, lng: float, phash: int, candidates: List[Candidate]) -> None:
+        now = time.monotonic()
+        key = self.cell_for(lat, lng)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = _Cell()
+        else:
+            self.cells.move_to_end(key)
+        entry = _Entry(
+            phash=phash,
+            candidates=[c.model_copy() for c in candidates],
+            expires_at=now + settings.RECOGNITION_CACHE_TTL_S,
+        )
+        cell.entries.append(entry)
+        cell.tree.add(phash, entry)
+        self.stats.stores += 1
+
+        # BK-trees do not support deletion; rebuild once the cell is mostly stale or full
+        max_entries = settings.RECOGNITION_CACHE_MAX_ENTRIES_PER_CELL
+        if len(cell.entries) > max_entries or (len(cell.entries) > 32 and cell.entries[0].expires_at <= now):
+            cell.rebuild(now, max_entries)
+
+        while len(self.cells) > settings.RECOGNITION_CACHE_MAX_CELLS:
+            self.cells.popitem(last=False)
+            self.stats.evicted_cells += 1
+
+    def clear(self) -> None:
+        self.cells.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**asdict(self.stats), "cells": len(self.cells)}
+
+
+# Global instance
+recognition_cache = RecognitionCache()
@@ -0,0 +1,57 @@
+# src/services/singleflight.py
+import asyncio
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+import logging
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    leaders: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is running await the same task and receive its result or
+    its exception. The work is shielded, so a caller that disconnects does not
+    cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.logger = logging.getLogger(f"service.singleflight.{name}")
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = SingleFlightStats()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+            self.logger.debug("coalesced duplicate call", extra={"key": str(key)[:24]})
+            return await asyncio.shield(task)
+
+        self.stats.leaders += 1
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every caller went away
+        if not task.cancelled() and task.exception() is not None:
+            self.stats.errors += 1
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def get_stats(self) -> dict:
+        return {**asdict(self.stats), "inflight": self.inflight}
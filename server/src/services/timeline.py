@@ -0,0 +1,54 @@
+# src/services/timeline.py
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class StreamUsage:
+    llm_input_tokens: int = 0
+    llm_output_tokens: int = 0
+    tts_chars: int = 0
+    text_bytes_sent: int = 0
+    audio_bytes_sent: int = 0
+    sentences: int = 0
+
+
+class StreamTimeline:
+    """Monotonic stage timeline and usage counters for one guide stream.
+
+    mark() appends (ms since start, event, attrs); it is a list append, cheap
+    enough to call per sentence and per send. to_dict() gives the record that is
+    logged once per guide and optionally attached to `eos`.
+    """
+
+    __slots__ = ("started", "events", "usage")
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.monotonic()
+        self.events: List[Tuple[int, str, Optional[Dict[str, Any]]]] = []
+        self.usage = StreamUsage()
+
+    def mark(self, event: str, **attrs: Any) -> None:
+        self.events.append((self.elapsed_ms(), event, attrs or None))
+
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+    def first(self, event: str) -> Optional[int]:
+        for ms, name, _ in self.events:
+            if name == event:
+                return ms
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "totalMs": self.elapsed_ms(),
+            "firstTextMs": self.first("text_sent"),
+            "firstAudioMs": self.first("audio_sent"),
+            "usage": asdict(self.usage),
+            "events": [
+                {"ms": ms, "event": name, **(attrs or {})}
+                for ms, name, attrs in self.events
+            ],
+        }
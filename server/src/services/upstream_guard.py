@@ -0,0 +1,290 @@
+# src/services/upstream_guard.py
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Deque, Optional
+import logging
+
+from ..core.config import settings
+from ..core.metrics import registry, UPSTREAM_ERRORS
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream that is overloaded or failing"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class LimiterTimeout(UpstreamUnavailable):
+    pass
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """429s and timeouts mean the upstream wants less traffic from us"""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status in (429, 503, 529):
+        return True
+    text = str(exc).lower()
+    return "rate limit" in text or "timed out" in text
+
+
+def is_upstream_fault(exc: BaseException) -> bool:
+    """Errors that say the upstream is unhealthy: overload, 5xx, timeouts, connection failures.
+
+    4xx responses (bad image, content policy, invalid request) are about one
+    caller's input and must not open the breaker for everyone.
+    """
+    if is_overload_error(exc):
+        return True
+    if isinstance(exc, (ConnectionError, OSError)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status >= 500
+    # SDK transport errors (openai.APIConnectionError / APITimeoutError, httpx.ConnectError, ...)
+    name = type(exc).__name__
+    return "Connection" in name or "Connect" in name or "Timeout" in name
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one upstream.
+
+    Fast successes widen the limit by roughly one slot per limit's worth of
+    calls; a latency spike (UPSTREAM_LATENCY_SPIKE_FACTOR above the EWMA of
+    recent latencies), a 429 or a timeout multiplies it by UPSTREAM_LIMIT_BACKOFF.
+    Callers beyond the limit wait up to UPSTREAM_QUEUE_TIMEOUT_S for a slot.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.limit = float(settings.UPSTREAM_LIMIT_INITIAL)
+        self.inflight = 0
+        self.ewma_latency_s: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            # release() hands the slot over by resolving the future
+            await asyncio.wait_for(fut, timeout=settings.UPSTREAM_QUEUE_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise LimiterTimeout(f"{self.name}: concurrency limit {int(self.limit)} reached")
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.inflight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < int(self.limit):
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.inflight += 1
+            fut.set_result(None)
+
+    def on_success(self, latency_s: float) -> None:
+        spike = (
+            self.ewma_latency_s is not None
+            and latency_s > self.ewma_latency_s * settings.UPSTREAM_LATENCY_SPIKE_FACTOR
+        )
+        prev = self.ewma_latency_s
+        self.ewma_latency_s = latency_s if prev is None else prev + 0.1 * (latency_s - prev)
+        if spike:
+            self._decrease()
+        else:
+            self.limit = min(float(settings.UPSTREAM_LIMIT_MAX), self.limit + 1.0 / self.limit)
+            self._wake()
+
+    def on_overload(self) -> None:
+        self._decrease()
+
+    def _decrease(self) -> None:
+        self.limit = max(float(settings.UPSTREAM_LIMIT_MIN), self.limit * settings.UPSTREAM_LIMIT_BACKOFF)
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open probe after a pause"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_inflight = False
+
+    @property
+    def retry_after_s(self) -> float:
+        return max(0.0, self.opened_at + settings.UPSTREAM_BREAKER_RESET_S - time.monotonic())
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now"""
+        if self.state == self.OPEN:
+            if self.retry_after_s > 0:
+                raise CircuitOpenError(f"{self.name}: circuit open")
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_inflight:
+                raise CircuitOpenError(f"{self.name}: circuit half-open, probe in flight")
+            self._probe_inflight = True
+
+    def on_success(self) -> None:
+        self.failures = 0
+        self.state = self.CLOSED
+        self._probe_inflight = False
+
+    def on_failure(self) -> None:
+        self._probe_inflight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= settings.UPSTREAM_BREAKER_FAILURES:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def on_cancel(self) -> None:
+        # A cancelled probe (e.g. a losing hedge) proves nothing either way
+        self._probe_inflight = False
+
+
+@dataclass
+class GuardStats:
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    overloads: int = 0
+    client_errors: int = 0  # 4xx and other non-upstream errors; not held against the breaker
+    rejected_open: int = 0
+    rejected_queue: int = 0
+    opened: int = 0
+
+
+class GuardSlot:
+    """Handle for a guarded call; streaming callers mark their first token"""
+
+    __slots__ = ("started", "first_token_s")
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_token_s: Optional[float] = None
+
+    def first_token(self) -> None:
+        if self.first_token_s is None:
+            self.first_token_s = time.monotonic() - self.started
+
+
+class UpstreamGuard:
+    """Adaptive concurrency limiter plus circuit breaker for one upstream"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.logger = logging.getLogger(f"service.upstream.{name}")
+        self.limiter = AdaptiveLimiter(name)
+        self.breaker = CircuitBreaker(name)
+        self.stats = GuardStats()
+
+    @property
+    def available(self) -> bool:
+        """Cheap pre-check so callers can pick a fallback without queueing"""
+        return self.breaker.state != CircuitBreaker.OPEN or self.breaker.retry_after_s <= 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[GuardSlot]:
+        try:
+            self.breaker.check()
+        except CircuitOpenError:
+            self.stats.rejected_open += 1
+            raise
+        try:
+            await self.limiter.acquire()
+        except LimiterTimeout:
+            self.stats.rejected_queue += 1
+            self.breaker.on_cancel()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.on_cancel()
+            raise
+        self.stats.calls += 1
+        handle = GuardSlot()
+        try:
+            yield handle
+        except Exception as e:
+            if not is_upstream_fault(e):
+                # The upstream answered; the request itself was bad
+                self.stats.client_errors += 1
+                UPSTREAM_ERRORS.labels(self.name, "client").inc()
+                self.breaker.on_cancel()
+                raise
+            self.stats.failures += 1
+            if is_overload_error(e):
+                self.stats.overloads += 1
+                self.limiter.on_overload()
+                UPSTREAM_ERRORS.labels(self.name, "overload").inc()
+            else:
+                UPSTREAM_ERRORS.labels(self.name, "error").inc()
+            was_open = self.breaker.state == CircuitBreaker.OPEN
+            self.breaker.on_failure()
+            if not was_open and self.breaker.state == CircuitBreaker.OPEN:
+                self.stats.opened += 1
+                self.logger.warning("circuit opened", extra={"upstream": self.name, "failures": self.breaker.failures})
+            raise
+        except BaseException:
+            # Cancelled (losing hedge, client gone) or stream closed early
+            self.breaker.on_cancel()
+            raise
+        else:
+            self.stats.successes += 1
+            latency = handle.first_token_s if handle.first_token_s is not None else time.monotonic() - handle.started
+            self.limiter.on_success(latency)
+            self.breaker.on_success()
+        finally:
+            self.limiter.release()
+
+    def get_stats(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "limit": round(self.limiter.limit, 2),
+            "inflight": self.limiter.inflight,
+            "state": self.breaker.state,
+        }
+
+
+# Global instances, one per upstream
+vision_guard = UpstreamGuard("vision")
+llm_guard = UpstreamGuard("llm")
+tts_guard = UpstreamGuard("tts")
+_guards = (vision_guard, llm_guard, tts_guard)
+
+registry.callback(
+    "upstream_concurrency_limit", "Current adaptive concurrency limit",
+    lambda: {(g.name,): g.limiter.limit for g in _guards}, ("upstream",),
+)
+registry.callback(
+    "upstream_inflight", "Upstream calls in flight",
+    lambda: {(g.name,): g.limiter.inflight for g in _guards}, ("upstream",),
+)
+registry.callback(
+    "upstream_circuit_open", "1 while the upstream circuit breaker is open",
+    lambda: {(g.name,): float(g.breaker.state == CircuitBreaker.OPEN) for g in _guards}, ("upstream",),
+)
+registry.callback(
+    "upstream_rejected_total", "Calls refused without reaching the upstream",
+    lambda: {
+        **{(g.name, "circuit_open"): g.stats.rejected_open for g in _guards},
+        **{(g.name, "queue_timeout"): g.stats.rejected_queue for g in _guards},
+    },
+    ("upstream", "reason"), type="counter",
+)
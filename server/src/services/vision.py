@@ -1,13 +1,50 @@
 # src/services/vision.py
 import base64
-import json
+import hashlib
 import asyncio
-from typing import List, Optional
-from any_llm import aresponses
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from ..core.config import settings
-from ..schemas.guide import IdentifyRequest, Candidate
+from ..schemas.guide import IdentifyRequest, Candidate, Geo
+from .image_preprocess import image_preprocessor, ImagePreprocessError, PreprocessResult
+from .recognition_cache import recognition_cache
+from .cache import cache
+from .landmark_index import landmark_index, LandmarkPrior
+from .singleflight import SingleFlight
+from .latency import LatencyWindow
+from .llm_router import llm_router, LLMRoute
+from .upstream_guard import vision_guard, UpstreamUnavailable
+from .incremental_json import IncrementalArrayParser
+from ..core.metrics import registry, VISION_REQUEST_S
 import logging
 
+
+@dataclass
+class VisionResult:
+    """Candidates plus where they came from (vision, cache, prior, timeout or degraded)"""
+    candidates: List[Candidate]
+    source: str
+    # Set when a low-confidence fast pass left a high-detail pass to run later;
+    # every call returns the same shared result
+    escalation: Optional[Callable[[], Awaitable["VisionResult"]]] = None
+    # True when a vision answer parsed completely; only those are cached
+    parsed: bool = False
+
+
+@dataclass
+class VisionStats:
+    calls: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    early_returns: int = 0
+    escalations: int = 0
+    escalation_improved: int = 0
+    timeouts: int = 0
+    errors: int = 0
+
+
 class VisionService:
     class VisionAPIError(Exception):
         pass
@@ -15,11 +52,28 @@ class VisionService:
     
     def __init__(self):
         self.logger = logging.getLogger("service.vision")
+        # Coalesces identical concurrent identify calls (double taps, client retries)
+        self.inflight = SingleFlight("vision")
+        # Latencies of successful model calls; drives the hedge delay
+        self.latency = LatencyWindow(settings.VISION_LATENCY_WINDOW)
+        self.stats = VisionStats()
+        # identify_id -> background high-detail pass, so a stream init can wait for it
+        self.escalations: Dict[str, asyncio.Task] = {}
     
     async def identify_location(self, request: IdentifyRequest) -> List[Candidate]:
         """
         Identify location from image and geographic coordinates
         """
+        result = await self.identify(request)
+        return result.candidates
+    
+    async def identify(self, request: IdentifyRequest, deadline: Optional[float] = None) -> VisionResult:
+        """
+        Identify location and report where the answer came from
+        
+        Order: near-duplicate cache, landmark prior index, vision model.
+        deadline is a time.monotonic() instant; the model call gives up after it.
+        """
         try:
             image_input: Optional[str] = None
             input_is_url: bool = False
@@ -37,9 +91,31 @@ class VisionService:
             if not settings.OPENAI_API_KEY:
                 raise self.VisionAPIError("OPENAI_API_KEY not configured")
 
-            prompt = self._create_vision_prompt(request.geo.lat, request.geo.lng)
-            candidates = await self._call_vision_api(image_input, prompt, input_is_url)
-            return candidates
+            async def _run() -> VisionResult:
+                image_b64 = image_input
+                processed = None
+                if settings.IMAGE_PREPROCESS_ENABLED:
+                    try:
+                        processed = await image_preprocessor.process(image_b64)
+                    except ImagePreprocessError as e:
+                        raise self.VisionAPIError(str(e))
+                    image_b64 = processed.base64
+                elif image_b64.startswith("data:"):
+                    image_b64 = image_b64.partition(",")[2]
+                return await self._identify_image(image_b64, request.geo, processed, deadline)
+
+            # Byte-identical images at (nearly) the same spot share one pipeline run,
+            # and one answer across workers through the shared cache
+            key = self._flight_key(image_input.encode("ascii", "ignore"), request.geo)
+            shared = await cache.get_json("identify", key)
+            if shared is not None:
+                return VisionResult([Candidate(**c) for c in shared], "cache")
+            result = await self.inflight.do(key, _run)
+            if result.source == "vision" and result.parsed and result.escalation is None and result.candidates:
+                await cache.set_json(
+                    "identify", key, [c.model_dump() for c in result.candidates], settings.IDENTIFY_RESULT_TTL_S,
+                )
+            return result
 
         except VisionService.VisionAPIError:
             # Propagate known vision errors to be handled at API layer
@@ -48,72 +124,347 @@ class VisionService:
             # Wrap unexpected errors so API layer can return proper error response
             raise self.VisionAPIError(str(e))
     
-    def _create_vision_prompt(self, lat: float, lng: float) -> str:
+    async def identify_processed(
+        self,
+        processed: PreprocessResult,
+        geo: Geo,
+        deadline: Optional[float] = None,
+    ) -> VisionResult:
+        """
+        Identify an already preprocessed frame (continuous-identify channel)
+        """
+        try:
+            key = self._flight_key(processed.data, geo)
+            return await self.inflight.do(key, lambda: self._identify_image(processed.base64, geo, processed, deadline))
+        except VisionService.VisionAPIError:
+            raise
+        except Exception as e:
+            raise self.VisionAPIError(str(e))
+    
+    def _flight_key(self, image: bytes, geo: Geo) -> Tuple[str, float, float]:
+        """Image digest plus coordinates rounded to ~10m"""
+        return hashlib.sha256(image).hexdigest(), round(geo.lat, 4), round(geo.lng, 4)
+    
+    async def _identify_image(
+        self,
+        image_b64: str,
+        geo: Geo,
+        processed: Optional[PreprocessResult],
+        deadline: Optional[float] = None,
+    ) -> VisionResult:
+        """Cache, then landmark prior, then the vision model"""
+        lat, lng = geo.lat, geo.lng
+        # The perceptual hash comes from the preprocessing pass
+        use_cache = processed is not None and settings.RECOGNITION_CACHE_ENABLED
+        if use_cache:
+            cached = recognition_cache.get(lat, lng, processed.phash)
+            if cached is not None:
+                self.logger.info("vision cache hit", extra={"num": len(cached)})
+                return VisionResult(candidates=cached, source="cache")
+
+        prior = landmark_index.lookup(lat, lng, geo.accuracyM)
+        if prior is not None and prior.strong:
+            self.logger.info("landmark prior hit", extra={
+                "spot": prior.spot,
+                "support": prior.support,
+                "share": prior.share,
+            })
+            candidates = [Candidate(spot=prior.spot, confidence=prior.confidence)]
+            return VisionResult(candidates=candidates, source="prior")
+        hint = prior if prior is not None and prior.support >= settings.LANDMARK_PRIOR_HINT_SUPPORT else None
+
+        prompt = self._create_vision_prompt(lat, lng, hint)
+        # Tiered: a low-detail fast pass first, full detail only when it is unsure
+        tiered = settings.VISION_TIERED_ENABLED and processed is not None
+        try:
+            if tiered:
+                fast = await image_preprocessor.process(processed.data, max_edge=settings.VISION_FAST_MAX_EDGE_PX)
+                candidates, parsed = await self._call_vision_api(fast.base64, prompt, False, deadline, detail="low")
+            else:
+                candidates, parsed = await self._call_vision_api(image_b64, prompt, False, deadline)
+        except asyncio.TimeoutError:
+            # Timeouts are not answers; never cache them
+            self.logger.error("vision error: timeout")
+            return VisionResult(candidates=[], source="timeout")
+        except UpstreamUnavailable as e:
+            # Vision upstream is shedding load; answer from the weak prior if there is one
+            self.logger.warning(f"vision unavailable, degraded answer: {e}")
+            fallback = [Candidate(spot=prior.spot, confidence=prior.confidence)] if prior is not None else []
+            return VisionResult(candidates=fallback, source="degraded")
+        if tiered and self._needs_escalation(candidates):
+            escalate = self._escalation(image_b64, prompt, geo, processed, candidates, parsed)
+            if not settings.VISION_ESCALATE_IN_BACKGROUND:
+                return await escalate()
+            # The fast answer goes out now; the cache is filled by the escalated pass
+            return VisionResult(candidates=candidates, source="vision", escalation=escalate, parsed=parsed)
+        if use_cache and parsed:
+            # Empty lists ("not a landmark") are cached as well, but not
+            # answers that were cut off or malformed
+            recognition_cache.put(lat, lng, processed.phash, candidates)
+        return VisionResult(candidates=candidates, source="vision", parsed=parsed)
+
+    def _needs_escalation(self, candidates: List[Candidate]) -> bool:
+        top = max((c.confidence for c in candidates), default=0.0)
+        return top < settings.VISION_ESCALATE_BELOW_CONFIDENCE
+
+    def _escalation(
+        self,
+        image_b64: str,
+        prompt: str,
+        geo: Geo,
+        processed: PreprocessResult,
+        fast: List[Candidate],
+        fast_parsed: bool,
+    ) -> Callable[[], Awaitable[VisionResult]]:
+        """Memoised high-detail pass; coalesced callers share one model call"""
+        task: Optional[asyncio.Task] = None
+
+        def run() -> Awaitable[VisionResult]:
+            nonlocal task
+            if task is None:
+                task = asyncio.ensure_future(self._escalate(image_b64, prompt, geo, processed, fast, fast_parsed))
+            return asyncio.shield(task)
+
+        return run
+
+    async def _escalate(
+        self,
+        image_b64: str,
+        prompt: str,
+        geo: Geo,
+        processed: PreprocessResult,
+        fast: List[Candidate],
+        fast_parsed: bool,
+    ) -> VisionResult:
+        self.stats.escalations += 1
+        deadline = time.monotonic() + settings.IDENTIFY_DEADLINE_S
+        try:
+            candidates, parsed = await self._call_vision_api(image_b64, prompt, False, deadline, detail="high", effort="low")
+        except (asyncio.TimeoutError, UpstreamUnavailable, VisionService.VisionAPIError) as e:
+            self.logger.warning(f"vision escalation failed, keeping fast answer: {e}")
+            return VisionResult(candidates=fast, source="vision", parsed=fast_parsed)
+        best = lambda cs: max((c.confidence for c in cs), default=0.0)
+        if best(candidates) < best(fast):
+            candidates, parsed = fast, fast_parsed
+        else:
+            self.stats.escalation_improved += 1
+        if settings.RECOGNITION_CACHE_ENABLED and parsed:
+            recognition_cache.put(geo.lat, geo.lng, processed.phash, candidates)
+        self.logger.info("vision escalation done", extra={
+            "top": candidates[0].spot if candidates else None,
+            "confidence": best(candidates),
+        })
+        return VisionResult(candidates=candidates, source="vision", parsed=parsed)
+
+    def track_escalation(self, identify_id: str, task: asyncio.Task) -> None:
+        """Expose a running escalation to the stream for identify_id until it finishes"""
+        self.escalations[identify_id] = task
+        task.add_done_callback(lambda _: self.escalations.pop(identify_id, None))
+    
+    def _create_vision_prompt(self, lat: float, lng: float, prior: Optional[LandmarkPrior] = None) -> str:
         """Create concise prompt for faster vision LLM response"""
+        hint = f"附近常被识别为: {prior.spot}。若图像相符请直接采用。" if prior else ""
         return (
             f"位置: lat {lat}, lng {lng}. "
+            f"{hint}"
             "请识别图像中的地标或景点。"
             "仅返回JSON: {\"candidates\":[{\"spot\":string,\"confidence\":number,\"bbox\"?:any}]}"
         )
     
     # Normalization removed: we accept only one base64 type from frontend
 
-    async def _call_vision_api(self, image_input: str, prompt: str, input_is_url: bool) -> List[Candidate]:
-        """Call external vision API using any_llm Responses API (OpenAI provider).
+    def _hedge_delay(self) -> float:
+        """Seconds to wait on the primary call before firing a hedge"""
+        if len(self.latency) < settings.VISION_HEDGE_MIN_SAMPLES:
+            return settings.VISION_HEDGE_DEFAULT_DELAY_S
+        p = self.latency.percentile(settings.VISION_HEDGE_PERCENTILE)
+        return max(settings.VISION_HEDGE_MIN_DELAY_S, p or 0.0)
+
+    async def _call_vision_api(
+        self,
+        image_input: str,
+        prompt: str,
+        input_is_url: bool,
+        deadline: Optional[float] = None,
+        detail: str = "auto",
+        effort: str = "minimal",
+    ) -> Tuple[List[Candidate], bool]:
+        """Call external vision API using any_llm Responses API via the LLM router.
 
         image_input: base64 (no data: prefix) or https URL when input_is_url=True
+        Returns the candidates and whether the answer parsed completely.
+
+        The primary request goes to the best vision-capable route. Once it runs past
+        the rolling latency percentile, or fails, a hedge request is fired at the
+        runner-up route (or the same one if it is the only route) and the first
+        successful answer wins; the loser is cancelled. Raises asyncio.TimeoutError
+        when the deadline passes without an answer.
         """
+        if deadline is None:
+            deadline = time.monotonic() + settings.IDENTIFY_DEADLINE_S
+        self.logger.info("vision request posted")
+        self.stats.calls += 1
+        user_content = [
+            {"type": "input_text", "text": prompt},
+        ]
+        # Attach image if present
+        if image_input:
+            user_content.append(
+                {
+                    "type": "input_image",
+                    "image_url": image_input if input_is_url else f"data:image/jpeg;base64,{image_input}",
+                    "detail": detail,
+                }
+            )
+
+        routes = llm_router.rank(vision=True)
+        if not routes:
+            raise self.VisionAPIError("No vision-capable LLM route configured")
+        hedge_route = routes[1] if len(routes) > 1 else routes[0]
+
+        primary = asyncio.create_task(self._vision_request(user_content, routes[0], effort, detail))
+        pending = {primary}
+        hedge: Optional[asyncio.Task] = None
+        hedge_delay = self._hedge_delay()
+        hedge_at = time.monotonic() + hedge_delay
+        error: Optional[BaseException] = None
+        try:
+            while pending or hedge is None:
+                now = time.monotonic()
+                if now >= deadline:
+                    self.stats.timeouts += 1
+                    raise asyncio.TimeoutError()
+                # A failed primary always gets one retry; a slow one only when hedging is on
+                failover = not pending
+                can_hedge = hedge is None and (settings.VISION_HEDGE_ENABLED or failover)
+                if can_hedge and (now >= hedge_at or failover):
+                    hedge = asyncio.create_task(self._vision_request(user_content, hedge_route, effort, detail))
+                    pending.add(hedge)
+                    if failover:
+                        self.stats.failovers += 1
+                    else:
+                        self.stats.hedges += 1
+                    self.logger.info("vision hedge fired", extra={
+                        "route": hedge_route.name,
+                        "after_s": round(hedge_delay, 2),
+                        "failover": failover,
+                    })
+                    continue
+                until = min(deadline, hedge_at) if can_hedge else deadline
+                done, pending = await asyncio.wait(pending, timeout=until - now, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        self.logger.warning(f"vision attempt failed: {task.exception()}")
+                        continue
+                    if task is hedge and error is None:
+                        self.stats.hedge_wins += 1
+                    candidates, parsed = task.result()
+                    candidates = sorted(candidates, key=lambda c: c.confidence, reverse=True)
+                    # Only log the final result
+                    self.logger.info("vision response result", extra={"candidates": [c.spot for c in candidates]})
+                    return candidates, parsed
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self.stats.errors += 1
+        if isinstance(error, UpstreamUnavailable):
+            raise error
+        self.logger.error(f"vision error: {error}")
+        # Try to surface OpenAI error message if available
         try:
-            self.logger.info("vision request posted")
-            user_content = [
-                {"type": "input_text", "text": prompt},
-            ]
-            # Attach image if present
-            if image_input:
-                user_content.append(
+            msg = str(getattr(error, "message", None) or getattr(error, "error", None) or error)
+        except Exception:
+            msg = str(error)
+        raise self.VisionAPIError(msg)
+
+    async def _vision_request(
+        self,
+        user_content: list,
+        route: LLMRoute,
+        effort: str = "minimal",
+        detail: str = "auto",
+    ) -> Tuple[List[Candidate], bool]:
+        """Stream one Responses call on one route, parsing candidates as they close.
+
+        Returns as soon as a candidate reaches VISION_EARLY_RETURN_CONFIDENCE (the
+        rest of the output is dropped), otherwise when the stream ends. A truncated
+        or malformed tail keeps every candidate that was already complete; the
+        flag returned alongside is False then, so the answer is not cached.
+        """
+        started = time.monotonic()
+        parser = IncrementalArrayParser("candidates")
+        candidates: List[Candidate] = []
+        malformed = False
+        async with vision_guard.slot() as slot:
+            stream = llm_router.stream_text(
+                routes=[route],
+                input_data=[
                     {
-                        "type": "input_image",
-                        "image_url": image_input if input_is_url else f"data:image/jpeg;base64,{image_input}"
+                        "role": "user",
+                        "content": user_content,
                     }
-                )
-
-            # Enforce upstream timeout to avoid client-side request timeouts
-            result = await asyncio.wait_for(
-                aresponses(
-                    provider="openai",
-                    model="gpt-5-nano",
-                    input_data=[
-                        {
-                            "role": "user",
-                            "content": user_content,
-                        }
-                    ],
-                    instructions=(
-                        "Return only compact JSON with keys: candidates:[{spot,confidence,bbox?}]."
-                    ),
-                    reasoning={"effort": "minimal"},
-                    text={"verbosity": "low"},
-                    max_output_tokens=800,
-                    api_key=settings.OPENAI_API_KEY,
+                ],
+                instructions=(
+                    "Return only compact JSON with keys: candidates:[{spot,confidence,bbox?}]."
+                    " List candidates in descending confidence."
                 ),
-                timeout=30,
+                reasoning={"effort": effort},
+                text={"verbosity": "low"},
+                max_output_tokens=800,
             )
-            content = getattr(result, "output_text", "")
-            # Only log the final result
-            self.logger.info(f"vision response result: {content}")
-            return self._parse_vision_response({"content": content})
-        except asyncio.TimeoutError:
-            self.logger.error("vision error: timeout")
-            return []
-        except Exception as e:
-            self.logger.error(f"vision error: {e}")
-            # Try to surface OpenAI error message if available
             try:
-                msg = str(getattr(e, "message", None) or getattr(e, "error", None) or e)
-            except Exception:
-                msg = str(e)
-            raise self.VisionAPIError(msg)
+                async for delta in stream:
+                    slot.first_token()
+                    for item in parser.feed(delta):
+                        candidate = self._to_candidate(item)
+                        if candidate is None:
+                            malformed = True
+                            continue
+                        candidates.append(candidate)
+                        if candidate.confidence >= settings.VISION_EARLY_RETURN_CONFIDENCE:
+                            self.stats.early_returns += 1
+                            self._observe(started, detail)
+                            return candidates, not malformed
+                    if parser.done:
+                        break
+            except Exception as e:
+                # Stream cut off mid-answer: keep the candidates that were complete
+                if not candidates:
+                    raise
+                self.logger.warning(f"vision stream broke after {len(candidates)} candidates: {e}")
+                malformed = True
+            finally:
+                await stream.aclose()
+        self._observe(started, detail)
+        return candidates, parser.done and not malformed
+
+    def _observe(self, started: float, detail: str) -> None:
+        elapsed = time.monotonic() - started
+        self.latency.add(elapsed)
+        VISION_REQUEST_S.labels(detail).observe(elapsed)
+
+    def get_stats(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "latency_p50_s": self.latency.percentile(0.5),
+            "latency_p90_s": self.latency.percentile(0.9),
+            "hedge_delay_s": round(self._hedge_delay(), 3),
+            "singleflight": self.inflight.get_stats(),
+            "upstream": vision_guard.get_stats(),
+        }
     
+    def _to_candidate(self, data: dict) -> Optional[Candidate]:
+        try:
+            return Candidate(
+                spot=data.get("spot", "未知地点"),
+                confidence=float(data.get("confidence", 0.5)),
+                bbox=data.get("bbox"),
+            )
+        except (TypeError, ValueError):
+            return None
+
     def _parse_vision_response(self, response: dict) -> List[Candidate]:
         """
         Parse response from vision API
@@ -122,32 +473,26 @@ class VisionService:
             response: API response dictionary
             
         Returns:
-            List of candidates
+            List of candidates (complete ones only if the JSON is cut short)
         """
-        try:
-            # Extract content from response
-            content = response.get("content", "")
-            
-            # Try to parse as JSON
-            if content.strip().startswith("{"):
-                data = json.loads(content)
-                candidates_data = data.get("candidates", [])
-                
-                candidates = []
-                for candidate_data in candidates_data:
-                    candidate = Candidate(
-                        spot=candidate_data.get("spot", "未知地点"),
-                        confidence=float(candidate_data.get("confidence", 0.5)),
-                        bbox=candidate_data.get("bbox")
-                    )
-                    candidates.append(candidate)
-                return candidates
-            else:
-                # Not JSON
-                return []
-                
-        except (json.JSONDecodeError, KeyError, ValueError):
-            return []
+        parser = IncrementalArrayParser("candidates")
+        items = parser.feed(response.get("content", "") or "")
+        return [c for c in (self._to_candidate(item) for item in items) if c is not None]
 
 # Global instance
 vision_service = VisionService()
+
+registry.callback(
+    "vision_calls_total", "Vision pipeline counters",
+    lambda: {(k,): v for k, v in asdict(vision_service.stats).items()},
+    ("event",), type="counter",
+)
+registry.callback(
+    "identify_coalesced_total", "Identify calls that joined an in-flight identical call",
+    lambda: vision_service.inflight.stats.coalesced, type="counter",
+)
+registry.callback(
+    "recognition_cache_events_total", "Recognition cache lookups and stores",
+    lambda: {(k,): v for k, v in asdict(recognition_cache.stats).items()},
+    ("event",), type="counter",
+)
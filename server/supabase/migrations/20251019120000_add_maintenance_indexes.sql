@@ -0,0 +1,6 @@
+-- Indexes backing the chunked maintenance deletes (src/services/maintenance.py).
+-- Each batch selects the oldest rows by created_at with a LIMIT and deletes them
+-- by primary key, so these indexes keep every batch a short range scan.
+
+create index if not exists idx_devices_created_at on devices (created_at);
+create index if not exists idx_identify_sessions_created_at on identify_sessions (created_at);
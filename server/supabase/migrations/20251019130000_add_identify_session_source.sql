@@ -0,0 +1,6 @@
+-- Record where an identify answer came from so the landmark prior index
+-- (src/services/landmark_index.py) only learns from real vision results.
+--   vision: answered by the vision model
+--   cache:  near-duplicate recognition cache hit
+--   prior:  answered from the landmark prior index
+alter table identify_sessions add column if not exists source text;
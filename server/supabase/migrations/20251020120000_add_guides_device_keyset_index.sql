@@ -0,0 +1,7 @@
+-- Keyset pagination for the guide history list (GET /guide/guides/{device_id}).
+-- Pages are "where device_id = ? and (created_at, guide_id) < (?, ?)
+-- order by created_at desc, guide_id desc limit n", so this index makes every
+-- page a short backward range scan no matter how deep the cursor is.
+
+create index if not exists idx_guides_device_created_guide
+  on guides (device_id, created_at desc, guide_id desc);
@@ -0,0 +1,27 @@
+-- One holder per maintenance job run across all workers and instances
+-- (src/services/maintenance.py). Every uvicorn worker schedules the jobs; the
+-- first to take the lease for an interval runs it, the others skip. Leases are
+-- not released after a run, they expire, so a worker whose timer fires a few
+-- seconds later in the same interval does not run the job again. A crashed
+-- holder's lease simply runs out.
+
+create table if not exists maintenance_leases (
+  job         text primary key,
+  holder      text not null,
+  expires_at  timestamptz not null
+);
+
+create or replace function try_acquire_maintenance_lease(p_job text, p_holder text, p_ttl_s int)
+returns boolean
+language sql
+as $$
+  with acquired as (
+    insert into maintenance_leases as l (job, holder, expires_at)
+    values (p_job, p_holder, now() + make_interval(secs => p_ttl_s))
+    on conflict (job) do update
+      set holder = excluded.holder, expires_at = excluded.expires_at
+      where l.expires_at < now()
+    returning 1
+  )
+  select exists (select 1 from acquired);
+$$;
@@ -0,0 +1,6 @@
+-- Set by the audio_objects maintenance job once a guide's segments passed
+-- AUDIO_RETENTION_HOURS and were removed. The row and transcript stay so the
+-- history list keeps the guide; clients show "audio expired" instead of replay.
+
+alter table guides
+  add column if not exists audio_expired boolean not null default false;
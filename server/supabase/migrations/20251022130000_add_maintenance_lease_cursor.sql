@@ -0,0 +1,6 @@
+-- Where a job that walks a listing in pages (audio_objects) resumes on its
+-- next run. Stored on the lease row because consecutive runs of a job may land
+-- on different workers; the lease upsert leaves this column alone.
+
+alter table maintenance_leases
+  add column if not exists resume_offset int not null default 0;